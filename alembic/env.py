@@ -15,6 +15,9 @@ sys.path.append(os.path.abspath(os.getcwd()))
 from app.core.config import settings
 from app.infrastructure.database.base import Base
 
+# Регистрация моделей в метаданных
+from app.infrastructure.models import user, order, order_outbox, order_stats  # noqa: F401
+
 # Настройка логирования Alembic
 config = context.config
 fileConfig(config.config_file_name)
@@ -0,0 +1,64 @@
+"""initial schema: users, orders
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+order_status = postgresql.ENUM(
+    'PENDING', 'PAID', 'SHIPPED', 'CANCELED',
+    name='order_status',
+    create_type=False,
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблицы могли быть созданы до появления миграций — создаём только недостающее
+    order_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_users_id', 'users', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True, if_not_exists=True)
+
+    op.create_table(
+        'orders',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('items', sa.JSON(), nullable=False),
+        sa.Column('total_price', sa.Float(), nullable=False),
+        sa.Column('status', order_status, nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('orders')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_table('users')
+    order_status.drop(op.get_bind(), checkfirst=True)
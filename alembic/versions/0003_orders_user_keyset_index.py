@@ -0,0 +1,43 @@
+"""orders (user_id, created_at desc, id) index for keyset pagination
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY не блокирует запись, но не может выполняться в транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_user_id_created_at_id',
+            'orders',
+            ['user_id', sa.text('created_at DESC'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_orders_user_id_created_at_id',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
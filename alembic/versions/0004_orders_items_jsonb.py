@@ -0,0 +1,142 @@
+"""orders.items JSON -> JSONB with jsonb_path_ops GIN index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Строк за одну транзакцию заполнения нового столбца
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _items_type() -> str:
+    return op.get_bind().execute(sa.text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = 'orders' AND column_name = 'items'"
+    )).scalar()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ALTER COLUMN ... TYPE jsonb переписал бы таблицу под ACCESS EXCLUSIVE.
+    # Вместо этого: новый столбец + триггер для новых записей, заполнение
+    # пачками, проверка NOT NULL без полного блокирующего сканирования
+    # и короткая транзакция с переименованием.
+    if _items_type() != 'jsonb':
+        # 1. Новый столбец без значения по умолчанию (только метаданные) и синхронизация записей
+        op.add_column('orders', sa.Column('items_jsonb', postgresql.JSONB(), nullable=True))
+        op.execute("""
+            CREATE OR REPLACE FUNCTION orders_items_jsonb_sync() RETURNS trigger AS $$
+            BEGIN
+                NEW.items_jsonb := NEW.items::jsonb;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute("""
+            CREATE TRIGGER orders_items_jsonb_sync
+            BEFORE INSERT OR UPDATE OF items ON orders
+            FOR EACH ROW EXECUTE FUNCTION orders_items_jsonb_sync()
+        """)
+
+        # 2. Заполнение существующих строк проходом по первичному ключу: каждая пачка —
+        # отдельная короткая транзакция, уже заполненные строки повторно не сканируются.
+        # Строку, занятую конкурентной транзакцией, UPDATE дожидается, а не пропускает
+        with op.get_context().autocommit_block():
+            bind = op.get_bind()
+            last_id = None
+            while True:
+                upper_id = bind.execute(sa.text("""
+                    SELECT id FROM (
+                        SELECT id FROM orders
+                        WHERE CAST(:last_id AS uuid) IS NULL OR id > CAST(:last_id AS uuid)
+                        ORDER BY id
+                        LIMIT :batch_size
+                    ) AS batch
+                    ORDER BY id DESC
+                    LIMIT 1
+                """), {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}).scalar()
+                if upper_id is None:
+                    break
+                bind.execute(sa.text("""
+                    UPDATE orders SET items_jsonb = items::jsonb
+                    WHERE (CAST(:last_id AS uuid) IS NULL OR id > CAST(:last_id AS uuid))
+                      AND id <= CAST(:upper_id AS uuid)
+                      AND items_jsonb IS NULL
+                """), {"last_id": last_id, "upper_id": upper_id})
+                last_id = upper_id
+
+            # Дозаполнение строк, оставшихся позади курсора (например, вставленных транзакцией,
+            # начатой до создания триггера). Завершение определяется проверкой, а не числом
+            # обновлённых строк
+            while bind.execute(sa.text("SELECT 1 FROM orders WHERE items_jsonb IS NULL LIMIT 1")).scalar():
+                bind.execute(sa.text("""
+                    UPDATE orders SET items_jsonb = items::jsonb
+                    WHERE id IN (
+                        SELECT id FROM orders
+                        WHERE items_jsonb IS NULL
+                        LIMIT :batch_size
+                    )
+                """), {"batch_size": BACKFILL_BATCH_SIZE})
+
+            # NOT VALID + VALIDATE проверяет строки под SHARE UPDATE EXCLUSIVE (запись не блокируется)
+            op.execute(
+                "ALTER TABLE orders ADD CONSTRAINT orders_items_jsonb_not_null "
+                "CHECK (items_jsonb IS NOT NULL) NOT VALID"
+            )
+            op.execute("ALTER TABLE orders VALIDATE CONSTRAINT orders_items_jsonb_not_null")
+
+        # 3. Подмена столбцов одной короткой транзакцией. SET NOT NULL использует
+        # проверенное ограничение и не сканирует таблицу; lock_timeout не даёт
+        # очереди блокировок вырасти за долгой транзакцией
+        op.execute("SET LOCAL lock_timeout = '5s'")
+        op.alter_column('orders', 'items_jsonb', nullable=False)
+        op.execute("ALTER TABLE orders DROP CONSTRAINT orders_items_jsonb_not_null")
+        op.execute("DROP TRIGGER orders_items_jsonb_sync ON orders")
+        op.execute("DROP FUNCTION orders_items_jsonb_sync()")
+        op.drop_column('orders', 'items')
+        op.alter_column('orders', 'items_jsonb', new_column_name='items')
+
+    # 4. GIN-индекс для запросов вхождения (items @> ...) без блокировки записи
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_items_gin',
+            'orders',
+            ['items'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'items': 'jsonb_path_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_orders_items_gin',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.alter_column(
+        'orders',
+        'items',
+        type_=sa.JSON(),
+        postgresql_using='items::json',
+        existing_nullable=False,
+    )
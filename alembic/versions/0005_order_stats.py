@@ -0,0 +1,53 @@
+"""order_stats summary table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 10:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+order_status = postgresql.ENUM(
+    'PENDING', 'PAID', 'SHIPPED', 'CANCELED',
+    name='order_status',
+    create_type=False,
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'order_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', order_status, nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'status'),
+    )
+
+    # Начальное заполнение по существующим заказам. Заказы, изменённые между
+    # миграцией и выкладкой нового кода, учитываются командой
+    # python -m app.rebuild_order_stats
+    op.execute("""
+        INSERT INTO order_stats (user_id, status, count, total)
+        SELECT user_id, COALESCE(status, 'PENDING'), count(*), COALESCE(sum(total_price), 0)
+        FROM orders
+        GROUP BY user_id, COALESCE(status, 'PENDING')
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_stats')
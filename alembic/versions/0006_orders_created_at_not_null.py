@@ -0,0 +1,57 @@
+"""orders.created_at NOT NULL
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 10:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Строк за одну транзакцию заполнения
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset-пагинация по (created_at DESC, id) не поддерживает NULL: в DESC они
+    # идут первыми и не попадают под условие created_at < :cursor. Время создания
+    # старых строк неизвестно, поэтому им присваивается начало эпохи — такие
+    # заказы оказываются в конце истории.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while bind.execute(sa.text("SELECT 1 FROM orders WHERE created_at IS NULL LIMIT 1")).scalar():
+            bind.execute(sa.text("""
+                UPDATE orders SET created_at = TIMESTAMP 'epoch'
+                WHERE id IN (
+                    SELECT id FROM orders
+                    WHERE created_at IS NULL
+                    LIMIT :batch_size
+                )
+            """), {"batch_size": BACKFILL_BATCH_SIZE})
+
+        # NOT VALID + VALIDATE проверяет строки под SHARE UPDATE EXCLUSIVE (запись не блокируется)
+        op.execute(
+            "ALTER TABLE orders ADD CONSTRAINT orders_created_at_not_null "
+            "CHECK (created_at IS NOT NULL) NOT VALID"
+        )
+        op.execute("ALTER TABLE orders VALIDATE CONSTRAINT orders_created_at_not_null")
+
+    # SET NOT NULL использует проверенное ограничение и не сканирует таблицу
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.alter_column('orders', 'created_at', existing_type=sa.DateTime(), nullable=False)
+    op.execute("ALTER TABLE orders DROP CONSTRAINT orders_created_at_not_null")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('orders', 'created_at', existing_type=sa.DateTime(), nullable=True)
@@ -1,16 +1,22 @@
-from fastapi import Depends, HTTPException, status
+from typing import AsyncIterator
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-# Конфигурация приложения
+# Настройки приложения (список администраторов)
 from app.core.config import settings
 
-# Репозиторий пользователя
-from app.infrastructure.repositories.user_repository import get_user_by_email
+# Кеш аутентифицированных пользователей
+from app.domain.services.auth.principal_cache import Principal, authenticate, peek_principal
+
+# Отметки недавних записей пользователя (read-your-writes)
+from app.domain.services.shared.read_your_writes import has_recent_write
 
-# Сессия подключения к БД
-from app.infrastructure.database.session import get_db
+# Сессии подключения к БД (primary и реплики)
+from app.infrastructure.database.session import AsyncSessionLocal, get_db
+from app.infrastructure.database.replica import replica_router
 
 # Инициализация схемы OAuth2 с использованием эндпоинта получения токена
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
@@ -19,21 +25,21 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
         db: AsyncSession = Depends(get_db)
-):
+) -> Principal:
     """
     Получает текущего пользователя на основе переданного JWT токена.
 
     Шаги:
-    1. Извлекает и декодирует токен.
-    2. Валидирует его подпись.
-    3. Извлекает email из поля `sub`.
-    4. Получает пользователя по email из БД.
+    1. Ищет уже проверенный токен в локальном кеше.
+    2. Декодирует токен и валидирует его подпись.
+    3. Берёт id и email пользователя из полей `uid` и `sub`.
+    4. Для старых токенов без `uid` — получает пользователя из Redis или БД.
 
     Если токен недействителен или пользователь не найден — вызывается HTTP 401.
 
     :param token: JWT-токен из заголовка авторизации.
     :param db: Асинхронная сессия базы данных.
-    :return: Объект пользователя.
+    :return: Аутентифицированный пользователь (id, email).
     """
     # Исключение для невалидных токенов
     credentials_exception = HTTPException(
@@ -43,23 +49,59 @@ async def get_current_user(
     )
 
     try:
-        # Декодирование токена
-        payload = jwt.decode(
-            token,
-            settings.secret_key,
-            algorithms=[settings.algorithm]
-        )
-
-        # Извлечение email из payload
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        principal = await authenticate(token, db)
     except JWTError:
         raise credentials_exception
 
-    # Получение пользователя из БД
-    user = await get_user_by_email(db, email)
-    if user is None:
+    if principal is None:
         raise credentials_exception
 
+    return principal
+
+
+def is_admin(user: Principal) -> bool:
+    """
+    Проверяет, входит ли пользователь в список администраторов (ADMIN_EMAILS_RAW).
+    """
+    return user.email.lower() in settings.admin_emails
+
+
+async def get_current_admin(user: Principal = Depends(get_current_user)) -> Principal:
+    """
+    Пропускает только администраторов (email из ADMIN_EMAILS_RAW), иначе HTTP 403.
+
+    :param user: Аутентифицированный пользователь.
+    :return: Аутентифицированный администратор.
+    """
+    if not is_admin(user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав")
     return user
+
+
+async def get_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Возвращает сессию для запросов только на чтение.
+
+    Если настроены реплики, сессия открывается к следующей доступной реплике.
+    Запрос уходит на primary, если реплик нет или все недоступны, а также
+    если пользователь недавно сам что-то записал (read-your-writes).
+
+    :param request: Текущий запрос (для определения пользователя по токену).
+    """
+    if replica_router.enabled and not await _recently_wrote(request):
+        session = replica_router.pick_session()
+        if session is not None:
+            async with session:
+                yield session
+            return
+
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def _recently_wrote(request: Request) -> bool:
+    authorization = request.headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return False
+    principal = peek_principal(authorization[7:])
+    return principal is not None and await has_recent_write(principal.id)
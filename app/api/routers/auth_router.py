@@ -4,11 +4,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 
 # Репозитории пользователей
-from app.infrastructure.repositories.user_repository import get_user_by_email, create_user
+from app.infrastructure.repositories.user_repository import (
+    get_user_by_email,
+    create_user,
+    update_user_password_hash,
+)
 
 # Сервисы аутентификации
 from app.domain.services.auth.auth_service import (
-    verify_password,
+    verify_and_update_password,
     create_access_token,
     create_refresh_token,
 )
@@ -23,11 +27,14 @@ from app.core.config import settings
 from app.schemas.user import UserCreate, UserOut
 from app.schemas.token import Token
 
+# Ограничение частоты запросов
+from app.domain.services.shared.rate_limiter import rate_limit
+
 # Инициализация маршрутизатора
 router = APIRouter()
 
 
-@router.post("/register/", response_model=UserOut)
+@router.post("/register/", response_model=UserOut, dependencies=[Depends(rate_limit("auth:register"))])
 async def register_user(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db)
@@ -48,7 +55,7 @@ async def register_user(
     return new_user
 
 
-@router.post("/token/", response_model=Token)
+@router.post("/token/", response_model=Token, dependencies=[Depends(rate_limit("auth:token"))])
 async def get_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
@@ -60,15 +67,27 @@ async def get_token(
     user = await get_user_by_email(db, form_data.username)
 
     # Проверка корректности пароля
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверные учетные данные"
+        )
+
+    verified, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверные учетные данные"
         )
 
-    # Генерация токенов
-    access_token = create_access_token({"sub": user.email})
-    refresh_token = create_refresh_token({"sub": user.email})
+    # Хэш создан с устаревшей стоимостью bcrypt — сохраняем пересчитанный
+    if new_hash:
+        await update_user_password_hash(db, user.id, new_hash)
+
+    # Генерация токенов; id пользователя в claims избавляет от запроса в БД при авторизации
+    claims = {"sub": user.email, "uid": user.id}
+    access_token = create_access_token(claims)
+    refresh_token = create_refresh_token(claims)
 
     # Возвращаем токены
     return {
@@ -78,7 +97,7 @@ async def get_token(
     }
 
 
-@router.post("/refresh/", response_model=Token)
+@router.post("/refresh/", response_model=Token, dependencies=[Depends(rate_limit("auth:refresh"))])
 async def refresh_token(refresh_token: str):
     """
     Обновление access токена с использованием refresh токена.
@@ -97,7 +116,10 @@ async def refresh_token(refresh_token: str):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
         # Генерируем новый access токен
-        new_access_token = create_access_token(data={"sub": email})
+        claims = {"sub": email}
+        if payload.get("uid") is not None:
+            claims["uid"] = payload["uid"]
+        new_access_token = create_access_token(data=claims)
 
         return {
             "access_token": new_access_token,
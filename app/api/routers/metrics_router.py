@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.metrics import render_metrics
+
+# Инициализация маршрутизатора
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Метрики приложения в формате Prometheus.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
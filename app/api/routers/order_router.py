@@ -1,34 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from uuid import UUID
-from typing import List
+from typing import List, Literal, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Pydantic-схемы заказов
-from app.schemas.order import OrderCreate, OrderOut, OrderUpdateStatus
+from app.schemas.order import (
+    OrderCreate,
+    OrderOut,
+    OrderPage,
+    OrderLookup,
+    OrderUpdateStatus,
+    OrderBatchCreate,
+    OrderBatchItemOut,
+    OrderStatsOut,
+)
+
+# Конфигурация приложения
+from app.core.config import settings
 
-# Модель пользователя для авторизации
-from app.infrastructure.models.user import User
+# Аутентифицированный пользователь запроса
+from app.domain.services.auth.principal_cache import Principal
 
 # Зависимости (получение БД и текущего пользователя)
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_read_db, get_current_user, is_admin
 
 # Сервисный слой для работы с заказами
 from app.domain.services.order.order_service import (
     handle_order_creation,
+    handle_bulk_order_creation,
     get_order_with_cache,
+    get_orders_batch_with_cache,
     update_order_status_service,
     get_user_orders_service,
+    get_user_order_stats_with_cache,
+    search_orders_by_sku_service,
+    export_user_orders_ndjson,
 )
 
+# Ограничение частоты запросов
+from app.domain.services.shared.rate_limiter import rate_limit
+
 # Инициализация маршрутизатора
 router = APIRouter()
 
 
-@router.post("/orders/", response_model=OrderOut)
+@router.post("/orders/", response_model=OrderOut, dependencies=[Depends(rate_limit("orders:create"))])
 async def create_order_api(
     order_data: OrderCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Создание нового заказа от имени текущего авторизованного пользователя.
@@ -43,22 +64,107 @@ async def create_order_api(
     return order
 
 
-@router.get("/orders/{order_id}/", response_model=OrderOut)
+@router.post("/orders/batch/", response_model=List[OrderBatchItemOut], dependencies=[Depends(rate_limit("orders:batch_create"))])
+async def create_orders_batch_api(
+    batch: OrderBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Пакетное создание заказов от имени текущего пользователя.
+    Все заказы вставляются одним запросом; ответ содержит результат по каждому заказу.
+    """
+    orders = await handle_bulk_order_creation(
+        db=db,
+        user_id=current_user.id,
+        orders=[order.model_dump() for order in batch.orders]
+    )
+    return [
+        {"index": index, "order": order}
+        for index, order in enumerate(orders)
+    ]
+
+
+@router.get("/orders/", response_model=List[OrderOut], dependencies=[Depends(rate_limit("orders:lookup"))])
+async def get_orders_batch(
+    ids: List[UUID] = Query(..., min_length=1, max_length=settings.orders_lookup_max_ids),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Получение нескольких заказов по списку UUID (?ids=...&ids=...).
+    Кеш опрашивается одним MGET, промахи загружаются из БД одним запросом.
+    Несуществующие заказы в ответ не попадают.
+    """
+    return _orders_response(await get_orders_batch_with_cache(db, ids))
+
+
+@router.post("/orders/lookup/", response_model=List[OrderOut], dependencies=[Depends(rate_limit("orders:lookup"))])
+async def lookup_orders(
+    lookup: OrderLookup,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    То же, что GET /orders/, но список UUID передаётся в теле запроса.
+    """
+    return _orders_response(await get_orders_batch_with_cache(db, lookup.ids))
+
+
+def _orders_response(orders: List[bytes]) -> Response:
+    """
+    Собирает JSON-массив из готовых байтов заказов без повторной сериализации.
+    """
+    return Response(content=b"[" + b",".join(orders) + b"]", media_type="application/json")
+
+
+@router.get("/orders/search", response_model=OrderPage, dependencies=[Depends(rate_limit("orders:search"))])
+async def search_orders(
+    sku: str = Query(..., min_length=1, max_length=100, description="SKU товара"),
+    scope: Literal["mine", "all"] = Query("mine", description="all — по всем пользователям (только администраторы)"),
+    limit: int = Query(settings.orders_page_default_size, ge=1, le=settings.orders_page_max_size),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из next_cursor"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Поиск заказов, содержащих товар с указанным SKU (от новых к старым).
+    По умолчанию — среди заказов текущего пользователя; scope=all доступен
+    только администраторам.
+
+    Маршрут объявлен до /orders/{order_id}/, чтобы "search" не разбирался как ID.
+    """
+    if scope == "all" and not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+
+    try:
+        orders, next_cursor = await search_orders_by_sku_service(
+            db, sku, limit, cursor,
+            user_id=None if scope == "all" else current_user.id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"items": orders, "next_cursor": next_cursor}
+
+
+@router.get("/orders/{order_id}/", response_model=OrderOut, dependencies=[Depends(rate_limit("orders:get"))])
 async def get_order(
     order_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получение заказа по UUID. Сначала выполняется попытка получения из Redis-кеша,
     при отсутствии — данные извлекаются из базы данных.
+
+    Кеш хранит готовое тело ответа, поэтому оно отдаётся как есть,
+    без повторной валидации и сериализации.
     """
     order = await get_order_with_cache(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Заказ не найден")
-    return order
+    return Response(content=order, media_type="application/json")
 
 
-@router.patch("/orders/{order_id}/")
+@router.patch("/orders/{order_id}/", dependencies=[Depends(rate_limit("orders:update_status"))])
 async def update_order_status_api(
     order_id: UUID,
     data: OrderUpdateStatus,
@@ -71,16 +177,62 @@ async def update_order_status_api(
     return {"message": "Статус заказа обновлён"}
 
 
-@router.get("/orders/user/{user_id}/", response_model=List[OrderOut])
+@router.get("/orders/user/{user_id}/", response_model=OrderPage, dependencies=[Depends(rate_limit("orders:list"))])
 async def get_user_orders(
+    user_id: int,
+    limit: int = Query(settings.orders_page_default_size, ge=1, le=settings.orders_page_max_size),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из next_cursor"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Получение страницы заказов по ID пользователя (от новых к старым).
+    Доступ разрешён только владельцу.
+    """
+    if current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="Нет доступа к чужим заказам")
+
+    try:
+        orders, next_cursor = await get_user_orders_service(db, user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"items": orders, "next_cursor": next_cursor}
+
+
+@router.get("/orders/user/{user_id}/stats", response_model=OrderStatsOut, dependencies=[Depends(rate_limit("orders:stats"))])
+async def get_user_order_stats(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Статистика заказов пользователя: число и сумма по статусам, всего заказов
+    и сумма трат. Читается из сводной таблицы и кеша, без обхода заказов.
+    Сводка (несколько строк по индексу) читается с основного сервера: ответ
+    кешируется, и отставшая реплика вернула бы в кеш устаревшие числа.
+    Доступ разрешён только владельцу.
+    """
+    if current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="Нет доступа к чужим заказам")
+
+    stats = await get_user_order_stats_with_cache(db, user_id)
+    return Response(content=stats, media_type="application/json")
+
+
+@router.get("/orders/user/{user_id}/export", dependencies=[Depends(rate_limit("orders:export"))])
+async def export_user_orders(
+    user_id: int,
+    current_user: Principal = Depends(get_current_user),
 ):
     """
-    Получение списка заказов по ID пользователя. Доступ разрешён только владельцу.
+    Потоковый экспорт всей истории заказов пользователя в формате NDJSON
+    (один заказ в строке). Доступ разрешён только владельцу.
     """
     if current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Нет доступа к чужим заказам")
 
-    return await get_user_orders_service(db, user_id)
+    return StreamingResponse(
+        export_user_orders_ndjson(user_id),
+        media_type="application/x-ndjson"
+    )
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_admin
+from app.core.config import settings
+from app.core.profiling import ProfilerBusy, profile_event_loop, slow_request_monitor
+
+# Метрики внутренних пулов и кешей
+from app.core.security import password_hasher
+from app.domain.services.cache.redis_cache import get_cache_stats
+from app.infrastructure.database.session import get_pool_stats
+from app.infrastructure.database.replica import replica_router
+
+# Инициализация маршрутизатора
+router = APIRouter()
+
+
+@router.get("/stats", dependencies=[Depends(get_current_admin)])
+async def get_stats():
+    """
+    Возвращает загрузку пула соединений БД, состояние реплик, счётчики кеша
+    заказов и состояние пула хэширования паролей текущего процесса.
+    Только для администраторов.
+    """
+    return {
+        "db_pool": get_pool_stats(),
+        "db_replicas": replica_router.get_stats(),
+        "cache": get_cache_stats(),
+        "password_hasher": password_hasher.get_stats(),
+    }
+
+
+@router.post("/profile", response_class=PlainTextResponse, dependencies=[Depends(get_current_admin)])
+async def run_profiler(
+        seconds: float = Query(10.0, gt=0, le=settings.profiler_max_seconds)
+):
+    """
+    Снимает стеки event loop текущего процесса в течение `seconds` секунд.
+
+    Возвращает collapsed stacks, пригодные для flamegraph.pl или speedscope.
+    При нескольких воркерах профилируется тот процесс, который принял запрос.
+    Только для администраторов.
+    """
+    try:
+        return await profile_event_loop(seconds)
+    except ProfilerBusy:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Профилирование уже выполняется")
+
+
+@router.get("/slow-requests", dependencies=[Depends(get_current_admin)])
+async def get_slow_requests():
+    """
+    Возвращает профили последних запросов, превысивших SLOW_REQUEST_THRESHOLD_MS,
+    в текущем процессе. Только для администраторов.
+    """
+    return {
+        "threshold_ms": settings.slow_request_threshold_ms,
+        "requests": slow_request_monitor.recent(),
+    }
@@ -5,19 +5,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user import UserOut
 
 # Зависимости для получения текущего пользователя и сессии БД
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_read_db
 
-# SQLAlchemy-модель пользователя
-from app.infrastructure.models.user import User
+# Аутентифицированный пользователь запроса
+from app.domain.services.auth.principal_cache import Principal
+
+# Ограничение частоты запросов
+from app.domain.services.shared.rate_limiter import rate_limit
 
 # Инициализация маршрутизатора
 router = APIRouter()
 
 
-@router.get("/about_me", response_model=UserOut, tags=["Users"])
+@router.get("/about_me", response_model=UserOut, tags=["Users"], dependencies=[Depends(rate_limit("users:me"))])
 async def get_me(
-        current_user: User = Depends(get_current_user),
-        db: AsyncSession = Depends(get_db)
+        current_user: Principal = Depends(get_current_user),
+        db: AsyncSession = Depends(get_read_db)
 ):
     """
     Возвращает данные текущего авторизованного пользователя.
@@ -0,0 +1,109 @@
+"""
+Отдельный сервис консьюмера событий заказов (SERVICE_TYPE=consumer).
+
+Запускает по одному процессу с собственным event loop на ядро
+(CONSUMER_PROCESSES, 0 — по числу CPU). Главный процесс перезапускает
+упавшие процессы, по SIGTERM/SIGINT передаёт сигнал дочерним и ждёт,
+пока они дообработают полученные сообщения.
+
+    python -m app.consumer
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from typing import Dict
+
+from app.core.config import settings
+from app.core.metrics import mark_process_dead
+from app.domain.services.messaging.rabbitmq_consumer import OrderEventConsumer
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед перезапуском упавшего процесса, сек
+RESTART_DELAY = 1.0
+
+
+async def _serve() -> None:
+    consumer = OrderEventConsumer()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, consumer.stop)
+    await consumer.run()
+
+
+def run_consumer_process() -> None:
+    """
+    Точка входа дочернего процесса. Ошибка подключения или обработки не
+    глушится: процесс завершается с ненулевым кодом и перезапускается.
+    """
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve())
+    finally:
+        mark_process_dead()
+
+
+def _start_metrics_server() -> None:
+    from prometheus_client import start_http_server
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(settings.consumer_metrics_port, registry=registry)
+    else:
+        start_http_server(settings.consumer_metrics_port)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    processes_count = settings.consumer_processes or os.cpu_count() or 1
+    context = multiprocessing.get_context("spawn")
+    processes: Dict[int, multiprocessing.Process] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        process = context.Process(target=run_consumer_process, name=f"consumer-{slot}")
+        process.start()
+        processes[slot] = process
+
+    def request_stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    _start_metrics_server()
+    for slot in range(processes_count):
+        spawn(slot)
+    logger.info(f"Запущено процессов консьюмера: {processes_count}")
+
+    # Наблюдение за дочерними процессами до сигнала остановки
+    while not stopping:
+        time.sleep(RESTART_DELAY)
+        for slot, process in list(processes.items()):
+            if not process.is_alive() and not stopping:
+                logger.error(f"Процесс {process.name} завершился с кодом {process.exitcode}, перезапуск")
+                spawn(slot)
+
+    # Дочерние процессы дообрабатывают сообщения; запас сверх drain_timeout — на закрытие соединений
+    deadline = time.monotonic() + settings.consumer_drain_timeout + 5
+    for process in processes.values():
+        process.join(max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            logger.warning(f"Процесс {process.name} не завершился вовремя и будет остановлен принудительно")
+            process.kill()
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
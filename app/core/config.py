@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Dict, List
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -23,16 +23,103 @@ class Settings(BaseSettings):
     db_user: str = Field(..., env="DB_USER")
     db_password: str = Field(..., env="DB_PASSWORD")
 
+    # Профиль движка БД: пул соединений на процесс (pool_size + max_overflow),
+    # кеш подготовленных запросов asyncpg и таймауты
+    db_echo: bool = Field(False, env="DB_ECHO")  # логирование SQL, только для отладки
+    db_pool_size: int = Field(10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, env="DB_POOL_TIMEOUT")  # ожидание свободного соединения, сек
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")  # пересоздание соединений, сек
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(100, env="DB_STATEMENT_CACHE_SIZE")
+    db_statement_timeout_ms: int = Field(30000, env="DB_STATEMENT_TIMEOUT_MS")
+    db_command_timeout: float = Field(60.0, env="DB_COMMAND_TIMEOUT")  # таймаут на стороне клиента, сек
+    db_application_name: str = Field("order_service", env="DB_APPLICATION_NAME")
+    db_pool_warmup: int = Field(5, env="DB_POOL_WARMUP")  # соединений, открываемых при старте процесса
+
+    # Реплики для чтения: DSN через запятую (postgresql+asyncpg://...), интервал
+    # проверки их доступности и окно read-your-writes после записи пользователя
+    db_replica_urls_raw: str = Field("", env="DB_REPLICA_URLS_RAW")
+    db_replica_health_interval: float = Field(5.0, env="DB_REPLICA_HEALTH_INTERVAL")
+    read_your_writes_seconds: float = Field(5.0, env="READ_YOUR_WRITES_SECONDS")
+
+    # Максимальное число заказов в одном запросе POST /orders/batch/
+    order_batch_max_size: int = Field(1000, env="ORDER_BATCH_MAX_SIZE")
+
+    # Размер страницы списка заказов пользователя
+    orders_page_default_size: int = Field(50, env="ORDERS_PAGE_DEFAULT_SIZE")
+    orders_page_max_size: int = Field(500, env="ORDERS_PAGE_MAX_SIZE")
+
+    # Максимальное число заказов в одном пакетном запросе на чтение
+    orders_lookup_max_ids: int = Field(200, env="ORDERS_LOOKUP_MAX_IDS")
+
+    # TTL кеша статистики заказов пользователя (сбрасывается при изменении его заказов)
+    order_stats_cache_ttl_seconds: int = Field(60, env="ORDER_STATS_CACHE_TTL_SECONDS")
+
+    # Число строк, получаемых за раз из серверного курсора при экспорте
+    orders_export_batch_size: int = Field(1000, env="ORDERS_EXPORT_BATCH_SIZE")
+
+    # Запуск API (python -m app.server): число процессов (0 — по числу CPU),
+    # event loop и HTTP-парсер, очередь входящих соединений, keep-alive и
+    # перезапуск процесса после заданного числа запросов (0 — без перезапуска)
+    web_host: str = Field("0.0.0.0", env="WEB_HOST")
+    web_port: int = Field(8000, env="WEB_PORT")
+    web_workers: int = Field(0, env="WEB_WORKERS")
+    web_loop: str = Field("uvloop", env="WEB_LOOP")
+    web_http: str = Field("httptools", env="WEB_HTTP")
+    web_backlog: int = Field(2048, env="WEB_BACKLOG")
+    web_keepalive_timeout: int = Field(75, env="WEB_KEEPALIVE_TIMEOUT")  # сек, больше таймаута балансировщика
+    web_limit_max_requests: int = Field(0, env="WEB_LIMIT_MAX_REQUESTS")
+    web_access_log: bool = Field(True, env="WEB_ACCESS_LOG")
+
     # Настройки Redis
     redis_host: str = Field(..., env="REDIS_HOST")
     redis_port: int = Field(..., env="REDIS_PORT")
     cache_ttl_seconds: int = Field(300, env="CACHE_TTL_SECONDS")  # TTL кеша в секундах
 
+    # Локальный (in-process) уровень кеша заказов перед Redis
+    local_cache_enabled: bool = Field(False, env="LOCAL_CACHE_ENABLED")
+    local_cache_max_size: int = Field(10000, env="LOCAL_CACHE_MAX_SIZE")
+    local_cache_ttl_seconds: float = Field(5.0, env="LOCAL_CACHE_TTL_SECONDS")
+    cache_invalidation_channel: str = Field("orders:invalidate", env="CACHE_INVALIDATION_CHANNEL")
+
+    # Защита от cache stampede: межпроцессная блокировка загрузки и ранний
+    # вероятностный пересчёт (XFetch, beta=0 отключает)
+    cache_lock_enabled: bool = Field(False, env="CACHE_LOCK_ENABLED")
+    cache_lock_timeout_ms: int = Field(2000, env="CACHE_LOCK_TIMEOUT_MS")
+    cache_xfetch_beta: float = Field(1.0, env="CACHE_XFETCH_BETA")
+
     # Настройки RabbitMQ
     rabbitmq_host: str = Field(..., env="RABBITMQ_HOST")
     rabbitmq_port: int = Field(..., env="RABBITMQ_PORT")
     rabbitmq_user: str = Field(..., env="RABBITMQ_USER")
     rabbitmq_password: str = Field(..., env="RABBITMQ_PASSWORD")
+    rabbitmq_channel_pool_size: int = Field(8, env="RABBITMQ_CHANNEL_POOL_SIZE")  # каналы издателя
+    rabbitmq_publish_timeout: float = Field(5.0, env="RABBITMQ_PUBLISH_TIMEOUT")  # ожидание confirm, сек
+
+    # Релей outbox: размер пачки, пауза при пустой очереди (сек), число воркеров
+    outbox_batch_size: int = Field(200, env="OUTBOX_BATCH_SIZE")
+    outbox_poll_interval: float = Field(0.5, env="OUTBOX_POLL_INTERVAL")
+    outbox_workers: int = Field(4, env="OUTBOX_WORKERS")
+
+    # Консьюмер событий: prefetch, число обработчиков, микропачки для Celery
+    consumer_prefetch_count: int = Field(256, env="CONSUMER_PREFETCH_COUNT")
+    consumer_concurrency: int = Field(8, env="CONSUMER_CONCURRENCY")
+    consumer_batch_size: int = Field(100, env="CONSUMER_BATCH_SIZE")
+    consumer_batch_timeout: float = Field(0.05, env="CONSUMER_BATCH_TIMEOUT")  # сек
+
+    # Режим консьюмера: встроенный в каждый процесс API или отдельный сервис
+    # (SERVICE_TYPE=consumer) с процессом на ядро (0 — по числу CPU)
+    consumer_embedded: bool = Field(True, env="CONSUMER_EMBEDDED")
+    consumer_processes: int = Field(0, env="CONSUMER_PROCESSES")
+    consumer_drain_timeout: float = Field(30.0, env="CONSUMER_DRAIN_TIMEOUT")  # сек
+    consumer_metrics_port: int = Field(9809, env="CONSUMER_METRICS_PORT")
+
+    # Celery-воркер: задач на процесс, забираемых заранее (каждая задача — пачка заказов)
+    celery_prefetch_multiplier: int = Field(4, env="CELERY_PREFETCH_MULTIPLIER")
+
+    # Порт HTTP-сервера метрик Prometheus в процессе Celery-воркера
+    celery_metrics_port: int = Field(9808, env="CELERY_METRICS_PORT")
 
     # Настройки безопасности
     secret_key: str = Field(..., env="SECRET_KEY")
@@ -40,11 +127,44 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = Field(..., env="ACCESS_TOKEN_EXPIRE_MINUTES")
     refresh_token_expire_days: int = Field(15, env="REFRESH_TOKEN_EXPIRE_DAYS")
 
-    # Rate limiting
+    # Хэширование паролей: стоимость bcrypt, размер пула потоков и
+    # максимум ожидающих операций (сверх него запросы отклоняются с 503)
+    bcrypt_rounds: int = Field(12, env="BCRYPT_ROUNDS")
+    password_hash_workers: int = Field(2, env="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(64, env="PASSWORD_HASH_MAX_PENDING")
+
+    # Кеш аутентифицированных пользователей: локальный (по хэшу токена) и Redis
+    principal_cache_max_size: int = Field(10000, env="PRINCIPAL_CACHE_MAX_SIZE")
+    principal_cache_ttl_seconds: float = Field(60.0, env="PRINCIPAL_CACHE_TTL_SECONDS")
+    user_cache_ttl_seconds: int = Field(300, env="USER_CACHE_TTL_SECONDS")
+
+    # Rate limiting: лимит по умолчанию ("100/minute") и лимиты отдельных маршрутов
+    # в формате "orders:create=20/second;auth:token=10/minute"
     rate_limit: str = Field(..., env="RATE_LIMIT")
+    rate_limit_routes_raw: str = Field("", env="RATE_LIMIT_ROUTES_RAW")
+    rate_limit_enabled: bool = Field(True, env="RATE_LIMIT_ENABLED")
+    rate_limit_lease_size: int = Field(10, env="RATE_LIMIT_LEASE_SIZE")  # токенов за одно обращение к Redis
+
+    # Администраторы (email через запятую): доступ к диагностическим эндпоинтам /system
+    admin_emails_raw: str = Field("", env="ADMIN_EMAILS_RAW")
 
-    # CORS (origins)
+    # Профилирование: интервал сэмплера по требованию, максимальная длительность сеанса;
+    # профили медленных запросов (порог 0 отключает middleware)
+    profiler_interval_ms: float = Field(5.0, env="PROFILER_INTERVAL_MS")
+    profiler_max_seconds: float = Field(60.0, env="PROFILER_MAX_SECONDS")
+    slow_request_threshold_ms: float = Field(0.0, env="SLOW_REQUEST_THRESHOLD_MS")
+    slow_request_sample_interval_ms: float = Field(10.0, env="SLOW_REQUEST_SAMPLE_INTERVAL_MS")
+    slow_request_buffer_size: int = Field(50, env="SLOW_REQUEST_BUFFER_SIZE")
+
+    # CORS (origins); пустой список отключает CORS-middleware.
+    # max_age — сколько секунд браузер кеширует ответ на preflight (OPTIONS)
     allowed_origins_raw: str = Field(..., env="ALLOWED_ORIGINS_RAW")
+    cors_max_age: int = Field(3600, env="CORS_MAX_AGE")
+
+    # Необязательные middleware: cookie-сессии (JWT-аутентификация их не использует)
+    # и метрики Prometheus (GET /metrics)
+    session_middleware_enabled: bool = Field(False, env="SESSION_MIDDLEWARE_ENABLED")
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
 
     @property
     def allowed_origins(self) -> List[str]:
@@ -53,6 +173,32 @@ class Settings(BaseSettings):
         """
         return [x.strip() for x in self.allowed_origins_raw.split(",") if x.strip()]
 
+    @property
+    def admin_emails(self) -> List[str]:
+        """
+        Преобразует строку с email администраторов в список строк.
+        """
+        return [x.strip().lower() for x in self.admin_emails_raw.split(",") if x.strip()]
+
+    @property
+    def db_replica_urls(self) -> List[str]:
+        """
+        Преобразует строку с DSN реплик в список строк.
+        """
+        return [x.strip() for x in self.db_replica_urls_raw.split(",") if x.strip()]
+
+    @property
+    def rate_limit_routes(self) -> Dict[str, str]:
+        """
+        Преобразует строку с лимитами маршрутов в словарь {маршрут: лимит}.
+        """
+        routes = {}
+        for item in self.rate_limit_routes_raw.split(";"):
+            if "=" in item:
+                scope, limit = item.split("=", 1)
+                routes[scope.strip()] = limit.strip()
+        return routes
+
     @property
     def database_url(self) -> str:
         """
@@ -0,0 +1,174 @@
+import functools
+import os
+import time
+from typing import Any, Awaitable, Callable, Tuple, TypeVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Метрики Prometheus. При нескольких процессах (воркеры uvicorn, Celery prefork)
+# переменная PROMETHEUS_MULTIPROC_DIR должна указывать на общий пустой каталог
+# и быть задана до импорта prometheus_client — это делает entrypoint.sh.
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Длительность обработки HTTP-запроса",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Число HTTP-запросов в обработке",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# Репозитории (запросы к БД)
+REPOSITORY_CALL_DURATION = Histogram(
+    "repository_call_duration_seconds",
+    "Длительность вызова функции репозитория",
+    ["function"],
+)
+
+# Кеш
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Обращения к кешу заказов по уровням",
+    ["tier", "result"],
+)
+CACHE_OPERATION_DURATION = Histogram(
+    "cache_operation_duration_seconds",
+    "Длительность операции с Redis",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+# RabbitMQ: публикация
+PUBLISH_DURATION = Histogram(
+    "rabbitmq_publish_duration_seconds",
+    "Длительность публикации пачки сообщений с ожиданием подтверждений",
+)
+PUBLISHED_MESSAGES = Counter(
+    "rabbitmq_published_messages_total",
+    "Опубликованные сообщения",
+    ["result"],
+)
+
+# RabbitMQ: консьюмер
+CONSUMED_MESSAGES = Counter(
+    "consumer_messages_total",
+    "Сообщения, обработанные консьюмером",
+    ["result"],
+)
+CONSUMER_BATCH_SIZE = Histogram(
+    "consumer_batch_size",
+    "Размер микропачки, переданной в Celery",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500),
+)
+CONSUMER_QUEUE_DEPTH = Gauge(
+    "consumer_queue_depth",
+    "Сообщения в очереди, ещё не выданные консьюмерам (отставание)",
+    multiprocess_mode="max",
+)
+
+# Celery
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Длительность выполнения задачи Celery",
+    ["task", "state"],
+)
+
+PROCESSED_ORDERS = Counter(
+    "processed_orders_total",
+    "Заказы, обработанные воркером, по итоговому статусу",
+    ["status"],
+)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def track_repository(fn: F) -> F:
+    """
+    Декоратор асинхронной функции репозитория: замеряет длительность вызова.
+    """
+    histogram = REPOSITORY_CALL_DURATION.labels(fn.__name__)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Формирует ответ для /metrics. В многопроцессном режиме значения
+    собираются по всем процессам из PROMETHEUS_MULTIPROC_DIR.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """
+    Удаляет файлы live-метрик завершающегося процесса (многопроцессный режим).
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class PrometheusMiddleware:
+    """
+    ASGI-middleware: гистограмма длительности запросов по маршрутам
+    и число запросов в обработке.
+
+    Маршрут берётся из шаблона пути (scope["route"]), а не из URL,
+    чтобы число временных рядов не зависело от ID в путях.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method,
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            ).observe(time.perf_counter() - started)
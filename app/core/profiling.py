@@ -0,0 +1,235 @@
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Any, Counter, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+# Профилирование по требованию. Стек потока event loop снимается из отдельного
+# потока через sys._current_frames(): профилируемый код не инструментируется,
+# поэтому вне сеанса профилирования накладных расходов нет.
+
+
+class ProfilerBusy(Exception):
+    """
+    Сеанс профилирования уже выполняется в этом процессе.
+    """
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def _collapse_frame(frame) -> str:
+    """
+    Сворачивает стек потока в строку "внешний;...;внутренний".
+    """
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _collapse_task(task: asyncio.Task) -> str:
+    """
+    Сворачивает await-стек задачи: цепочку корутин, на которой она приостановлена.
+
+    Task.get_stack() для приостановленной задачи возвращает только внешний
+    кадр, поэтому цепочка собирается по cr_await/gi_yieldfrom от корутины
+    задачи до первого объекта без кадра (Future, awaitable драйвера и т. п.).
+    """
+    labels = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            labels.append(type(awaitable).__qualname__)
+            break
+        labels.append(_frame_label(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return ";".join(labels)
+
+
+def format_collapsed(samples: Counter) -> str:
+    """
+    Формирует вывод в формате collapsed stacks (flamegraph.pl, speedscope, inferno).
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+def _sample_thread(thread_id: int, seconds: float, interval: float) -> Counter:
+    samples: Counter = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            samples[_collapse_frame(frame)] += 1
+        time.sleep(interval)
+    return samples
+
+
+_profile_lock = asyncio.Lock()
+
+
+async def profile_event_loop(seconds: float, interval: float = settings.profiler_interval_ms / 1000) -> str:
+    """
+    Снимает стеки потока event loop в течение заданного времени.
+
+    Сэмплер работает в отдельном потоке и не блокирует обработку запросов.
+    Одновременно допускается только один сеанс.
+
+    :param seconds: Длительность сеанса профилирования, сек.
+    :param interval: Интервал между снимками стека, сек.
+    :return: Стеки в формате collapsed stacks.
+    """
+    if _profile_lock.locked():
+        raise ProfilerBusy()
+
+    async with _profile_lock:
+        samples = await asyncio.to_thread(_sample_thread, threading.get_ident(), seconds, interval)
+    return format_collapsed(samples)
+
+
+class _InFlightRequest:
+    __slots__ = ("method", "path", "started", "task", "loop_samples", "await_samples")
+
+    def __init__(self, method: str, path: str, task: Optional[asyncio.Task]):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.task = task
+        self.loop_samples: Counter = collections.Counter()
+        self.await_samples: Counter = collections.Counter()
+
+
+class SlowRequestMonitor:
+    """
+    Профили медленных запросов.
+
+    Middleware лишь регистрирует запросы в обработке. Пока они есть, фоновый
+    поток раз в интервал проверяет, есть ли запросы дольше порога, и только
+    для них снимает стек потока event loop (CPU-работа и блокирующие вызовы)
+    и await-стек задачи запроса (ожидание БД, Redis, брокера). Без запросов
+    в обработке поток ждёт события и не просыпается. Запросы, превысившие
+    порог, попадают в кольцевой буфер вместе с собранными стеками.
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.slow_request_threshold_ms / 1000,
+        interval: float = settings.slow_request_sample_interval_ms / 1000,
+        buffer_size: int = settings.slow_request_buffer_size,
+    ):
+        self._threshold = threshold
+        self._interval = interval
+        self._in_flight: Dict[int, _InFlightRequest] = {}
+        self._recent: Deque[Dict[str, Any]] = collections.deque(maxlen=buffer_size)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+        # Установлено, пока есть запросы в обработке; без них поток не просыпается
+        self._active = threading.Event()
+
+    def begin(self, request_id: int, method: str, path: str) -> None:
+        if self._watchdog is None:
+            self._start_watchdog()
+        self._in_flight[request_id] = _InFlightRequest(method, path, asyncio.current_task())
+        self._active.set()
+
+    def end(self, request_id: int, route: Optional[str], status_code: int) -> None:
+        request = self._in_flight.pop(request_id, None)
+        if not self._in_flight:
+            self._active.clear()
+        if request is None:
+            return
+        duration = time.perf_counter() - request.started
+        if duration < self._threshold:
+            return
+        self._recent.append({
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 1),
+            "finished_at": time.time(),
+            "loop_stacks": format_collapsed(request.loop_samples),
+            "await_stacks": format_collapsed(request.await_samples),
+        })
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """
+        Возвращает сохранённые профили медленных запросов, начиная с последнего.
+        """
+        return list(reversed(self._recent))
+
+    def _start_watchdog(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._watchdog = threading.Thread(target=self._watch, name="slow-request-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def _watch(self) -> None:
+        while not self._loop.is_closed():
+            self._active.wait()
+            time.sleep(self._interval)
+            now = time.perf_counter()
+            slow = [r for r in list(self._in_flight.values()) if now - r.started >= self._threshold]
+            if not slow:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            loop_stack = _collapse_frame(frame) if frame is not None else None
+            for request in slow:
+                if loop_stack is not None:
+                    request.loop_samples[loop_stack] += 1
+                # await-стек читается в потоке event loop, где состояние задачи согласовано
+                try:
+                    self._loop.call_soon_threadsafe(self._sample_await_stack, request)
+                except RuntimeError:
+                    return
+
+    @staticmethod
+    def _sample_await_stack(request: _InFlightRequest) -> None:
+        if request.task is not None and not request.task.done():
+            request.await_samples[_collapse_task(request.task)] += 1
+
+
+# Экземпляр монитора, используется middleware и эндпоинтом /system/slow-requests
+slow_request_monitor = SlowRequestMonitor()
+
+
+class SlowRequestMiddleware:
+    """
+    ASGI-middleware: сохраняет профиль запросов, выполнявшихся дольше
+    SLOW_REQUEST_THRESHOLD_MS. Подключается, только если порог задан.
+    """
+
+    def __init__(self, app, monitor: SlowRequestMonitor = slow_request_monitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = id(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.monitor.begin(request_id, scope["method"], scope["path"])
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            self.monitor.end(request_id, getattr(route, "path", None), status_code)
@@ -1,33 +1,94 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
-# Инициализация контекста для хэширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Инициализация контекста для хэширования паролей.
+# min/max rounds совпадают со стоимостью из настроек: при её изменении
+# хэши со старой стоимостью считаются устаревшими и пересчитываются при входе
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+class PasswordHasherOverloaded(Exception):
     """
-    Проверяет соответствие открытого пароля и хэша.
-
-    :param plain_password: Пароль в открытом виде
-    :param hashed_password: Захэшированный пароль из БД
-    :return: True, если пароли совпадают, иначе False
+    Очередь операций хэширования паролей переполнена.
     """
-    return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+class PasswordHasher:
     """
-    Хэширует пароль для хранения в базе данных.
+    Выполняет bcrypt в отдельном пуле потоков ограниченного размера,
+    чтобы хэширование не блокировало event loop.
 
-    :param password: Открытый пароль
-    :return: Хэш пароля
+    bcrypt отпускает GIL, поэтому потоков достаточно. Число одновременно
+    ожидающих операций ограничено: при переполнении бросается
+    PasswordHasherOverloaded, а не растёт очередь и задержка.
     """
-    return pwd_context.hash(password)
+
+    def __init__(self, workers: int, max_pending: int):
+        self._workers = workers
+        self._max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self._max_pending:
+            self._rejected += 1
+            raise PasswordHasherOverloaded
+
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+            self._busy_seconds += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        """
+        Хэширует пароль с текущей стоимостью bcrypt.
+        """
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Проверяет пароль. Если хэш устарел (изменилась стоимость bcrypt),
+        вторым элементом возвращается новый хэш, иначе None.
+        """
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Метрики пула: размер, текущая очередь, выполненные и отклонённые операции.
+        """
+        return {
+            "workers": self._workers,
+            "max_pending": self._max_pending,
+            "pending": self._pending,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "busy_seconds": round(self._busy_seconds, 3),
+        }
+
+
+# Пул хэширования паролей, общий для всего приложения
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_max_pending)
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
@@ -1,12 +1,10 @@
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
 
 from jose import jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
-
-# Контекст для хэширования и проверки паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.security import password_hasher
 
 
 def create_access_token(data: dict) -> str:
@@ -35,12 +33,16 @@ def create_refresh_token(data: dict) -> str:
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
     """
-    Проверяет, соответствует ли открытый пароль хэшу.
+    Проверяет пароль и, если хэш создан с устаревшей стоимостью bcrypt,
+    возвращает новый хэш для сохранения.
 
     :param plain_password: Пароль в открытом виде
     :param hashed_password: Хэш пароля из БД
-    :return: True, если пароли совпадают, иначе False
+    :return: (пароль верен, новый хэш или None)
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
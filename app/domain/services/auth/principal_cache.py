@@ -0,0 +1,119 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.domain.services.cache.redis_cache import get_user_from_cache, set_user_to_cache
+from app.domain.services.shared.lru_cache import LRUCache
+from app.infrastructure.repositories.user_repository import get_user_by_email
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Аутентифицированный пользователь запроса.
+
+    Атрибуты:
+        id (int): Идентификатор пользователя.
+        email (str): Email пользователя.
+    """
+    id: int
+    email: str
+
+
+# Проверенные токены: хэш токена -> Principal. Запись живёт не дольше срока действия токена
+_principals = LRUCache(settings.principal_cache_max_size, settings.principal_cache_ttl_seconds)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def get_cached_principal(token: str) -> Optional[Principal]:
+    """
+    Возвращает пользователя по уже проверенному токену без декодирования JWT
+    и без обращения к БД; None, если токена нет в локальном кеше.
+    """
+    return _principals.get(_token_key(token))
+
+
+def peek_principal(token: str) -> Optional[Principal]:
+    """
+    Определяет пользователя по токену без обращения к Redis и БД:
+    из локального кеша или из claims `uid`/`sub` проверенного JWT.
+    Возвращает None для невалидных токенов и токенов без `uid`.
+    """
+    principal = get_cached_principal(token)
+    if principal is not None:
+        return principal
+
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+
+    if payload.get("sub") is None or payload.get("uid") is None:
+        return None
+
+    principal = Principal(id=payload["uid"], email=payload["sub"])
+    _remember(_token_key(token), principal, payload)
+    return principal
+
+
+async def authenticate(token: str, db: AsyncSession) -> Optional[Principal]:
+    """
+    Определяет пользователя по access-токену.
+
+    1. Локальный LRU по хэшу токена — без декодирования JWT.
+    2. Декодирование JWT; если в токене есть id пользователя (claim `uid`),
+       обращение к хранилищам не требуется.
+    3. Для токенов без `uid` — кеш пользователей в Redis, затем БД.
+
+    Бросает JWTError для невалидного токена; None — пользователь не найден.
+    """
+    key = _token_key(token)
+    principal = _principals.get(key)
+    if principal is not None:
+        return principal
+
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    email = payload.get("sub")
+    if email is None:
+        return None
+
+    user_id = payload.get("uid")
+    if user_id is not None:
+        principal = Principal(id=user_id, email=email)
+    else:
+        principal = await _load_principal(db, email)
+        if principal is None:
+            return None
+
+    _remember(key, principal, payload)
+    return principal
+
+
+def _remember(key: bytes, principal: Principal, payload: dict) -> None:
+    # Закешированный токен не должен пережить свой срок действия
+    ttl = settings.principal_cache_ttl_seconds
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _principals.set(key, principal, ttl=ttl)
+
+
+async def _load_principal(db: AsyncSession, email: str) -> Optional[Principal]:
+    cached = await get_user_from_cache(email)
+    if cached is not None:
+        return Principal(**cached)
+
+    user = await get_user_by_email(db, email)
+    if user is None:
+        return None
+
+    await set_user_to_cache({"id": user.id, "email": user.email})
+    return Principal(id=user.id, email=user.email)
@@ -1,53 +1,328 @@
-import json
-from typing import Optional
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
 
+import orjson
 import redis.asyncio as redis
-from pydantic.json import pydantic_encoder
 
 from app.core.config import settings
+from app.core.metrics import CACHE_OPERATION_DURATION, CACHE_REQUESTS
+from app.domain.services.shared.lru_cache import LRUCache
+
+# Инициализация логгера
+logger = logging.getLogger(__name__)
 
 # Время жизни кеша (в секундах), берётся из настроек
 CACHE_TTL = settings.cache_ttl_seconds
 
-# Инициализация клиента Redis (singleton)
+# Префикс версии формата кеша. Значение заказа хранится как готовые байты
+# JSON-ответа; записи другой версии считаются промахом.
+CACHE_FORMAT_VERSION = b"v1:"
+
+# Инициализация клиента Redis (singleton). Ответы не декодируются:
+# закешированные заказы отдаются клиенту как есть, без перекодирования
 redis_client = redis.Redis(
     host=settings.redis_host,
     port=settings.redis_port,
-    decode_responses=True  # преобразует байты в строки
 )
 
+# Локальный уровень кеша: отдаёт горячие заказы без обращения к Redis.
+# Записи сбрасываются во всех процессах через Redis pub/sub, TTL ограничивает
+# устаревание на случай потерянного сообщения.
+local_cache: Optional[LRUCache] = (
+    LRUCache(settings.local_cache_max_size, settings.local_cache_ttl_seconds)
+    if settings.local_cache_enabled else None
+)
+
+# Счётчики попаданий и промахов по уровням кеша
+_stats: Dict[str, int] = {
+    "local_hits": 0,
+    "local_misses": 0,
+    "redis_hits": 0,
+    "redis_misses": 0,
+}
+
+
+def _count(tier: str, hit: bool) -> None:
+    _stats[f"{tier}_hits" if hit else f"{tier}_misses"] += 1
+    CACHE_REQUESTS.labels(tier, "hit" if hit else "miss").inc()
 
-async def get_order_from_cache(order_id: str) -> Optional[dict]:
+
+def get_cache_stats() -> Dict[str, int]:
+    """
+    Возвращает счётчики попаданий и промахов локального уровня и Redis.
     """
-    Извлекает заказ из Redis по ID, если он есть.
+    return {**_stats, "local_size": len(local_cache) if local_cache is not None else 0}
+
+
+# Снятие блокировки только её владельцем (сравнение токена и удаление атомарно)
+_release_lock_script = redis_client.register_script(
+    """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+)
+
+
+async def get_order_from_cache(order_id: str) -> Optional[bytes]:
+    """
+    Извлекает заказ из кеша по ID: сначала из локального уровня, затем из Redis.
 
     :param order_id: Идентификатор заказа в виде строки
-    :return: Словарь с данными заказа или None
+    :return: JSON заказа в виде байтов (готовое тело ответа) или None
+    """
+    order_data, _ = await get_order_from_cache_with_ttl(order_id)
+    return order_data
+
+
+async def get_order_from_cache_with_ttl(order_id: str) -> Tuple[Optional[bytes], Optional[float]]:
+    """
+    Как get_order_from_cache, но дополнительно возвращает оставшийся TTL ключа
+    в Redis (в секундах) — за тот же сетевой запрос. Для попаданий в локальный
+    уровень TTL не известен и возвращается None.
+    """
+    if local_cache is not None:
+        cached = local_cache.get(order_id)
+        if cached is not None:
+            _count("local", hit=True)
+            return cached, None
+        _count("local", hit=False)
+
+    with CACHE_OPERATION_DURATION.labels("get").time():
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(f"order:{order_id}")
+            pipe.pttl(f"order:{order_id}")
+            cached, ttl_ms = await pipe.execute()
+
+    if cached and cached.startswith(CACHE_FORMAT_VERSION):
+        _count("redis", hit=True)
+        order_data = cached[len(CACHE_FORMAT_VERSION):]
+        if local_cache is not None:
+            local_cache.set(order_id, order_data)
+        return order_data, (ttl_ms / 1000 if ttl_ms > 0 else None)
+
+    _count("redis", hit=False)
+    return None, None
+
+
+async def get_orders_from_cache(order_ids: List[str]) -> Dict[str, bytes]:
     """
-    order_json = await redis_client.get(f"order:{order_id}")
-    if order_json:
-        return json.loads(order_json)
-    return None
+    Извлекает несколько заказов за один запрос к Redis (MGET);
+    попадания в локальный уровень в запрос не включаются.
+
+    :return: Словарь ID -> JSON заказа для найденных в кеше заказов
+    """
+    found: Dict[str, bytes] = {}
+    missing = order_ids
+
+    if local_cache is not None:
+        missing = []
+        for order_id in order_ids:
+            cached = local_cache.get(order_id)
+            if cached is not None:
+                _count("local", hit=True)
+                found[order_id] = cached
+            else:
+                _count("local", hit=False)
+                missing.append(order_id)
 
+    if not missing:
+        return found
 
-async def set_order_to_cache(order_id: str, order_data: dict) -> None:
+    with CACHE_OPERATION_DURATION.labels("mget").time():
+        values = await redis_client.mget([f"order:{order_id}" for order_id in missing])
+    for order_id, cached in zip(missing, values):
+        if cached and cached.startswith(CACHE_FORMAT_VERSION):
+            _count("redis", hit=True)
+            found[order_id] = cached[len(CACHE_FORMAT_VERSION):]
+            if local_cache is not None:
+                local_cache.set(order_id, found[order_id])
+        else:
+            _count("redis", hit=False)
+    return found
+
+
+async def acquire_order_lock(order_id: str) -> Optional[str]:
+    """
+    Захватывает межпроцессную блокировку загрузки заказа.
+
+    :return: Токен владельца или None, если блокировка уже занята
+    """
+    token = uuid4().hex
+    acquired = await redis_client.set(
+        name=f"lock:order:{order_id}",
+        value=token,
+        nx=True,
+        px=settings.cache_lock_timeout_ms
+    )
+    return token if acquired else None
+
+
+async def is_order_lock_held(order_id: str) -> bool:
+    """
+    Проверяет, занята ли блокировка загрузки заказа.
+    """
+    return bool(await redis_client.exists(f"lock:order:{order_id}"))
+
+
+async def release_order_lock(order_id: str, token: str) -> None:
+    """
+    Снимает блокировку, если она всё ещё принадлежит владельцу токена.
+    """
+    await _release_lock_script(keys=[f"lock:order:{order_id}"], args=[token])
+
+
+async def set_order_to_cache(order_id: str, order_data: bytes) -> None:
     """
     Сохраняет заказ в Redis с заданным временем жизни.
 
     :param order_id: Идентификатор заказа
-    :param order_data: Словарь с данными заказа
+    :param order_data: JSON заказа в виде байтов (см. order_serializer.encode_order)
     """
-    await redis_client.set(
-        name=f"order:{order_id}",
-        value=json.dumps(order_data, default=pydantic_encoder),  # сериализация UUID и datetime
-        ex=CACHE_TTL  # TTL в секундах
-    )
+    with CACHE_OPERATION_DURATION.labels("set").time():
+        await redis_client.set(
+            name=f"order:{order_id}",
+            value=CACHE_FORMAT_VERSION + order_data,
+            ex=CACHE_TTL  # TTL в секундах
+        )
+
+
+async def set_orders_to_cache(orders: Dict[str, bytes]) -> None:
+    """
+    Сохраняет несколько заказов в Redis одним конвейером (pipeline).
+
+    :param orders: Словарь ID -> JSON заказа
+    """
+    if not orders:
+        return
+    with CACHE_OPERATION_DURATION.labels("mset").time():
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for order_id, order_data in orders.items():
+                pipe.set(f"order:{order_id}", CACHE_FORMAT_VERSION + order_data, ex=CACHE_TTL)
+            await pipe.execute()
 
 
 async def delete_order_cache(order_id: str) -> None:
     """
-    Удаляет заказ из Redis-кеша по его ID.
+    Удаляет заказ из Redis-кеша по его ID и сбрасывает локальный уровень
+    во всех процессах приложения.
 
     :param order_id: Идентификатор заказа
     """
-    await redis_client.delete(f"order:{order_id}")
+    if local_cache is None:
+        await redis_client.delete(f"order:{order_id}")
+        return
+
+    local_cache.pop(order_id)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(f"order:{order_id}")
+        pipe.publish(settings.cache_invalidation_channel, order_id)
+        await pipe.execute()
+
+
+async def delete_orders_cache(order_ids: Iterable[str]) -> None:
+    """
+    Удаляет несколько заказов из Redis-кеша и сбрасывает их копии
+    в локальном уровне кеша всех процессов — одним конвейером.
+
+    :param order_ids: Идентификаторы заказов
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(*(f"order:{order_id}" for order_id in order_ids))
+        if local_cache is not None:
+            for order_id in order_ids:
+                local_cache.pop(order_id)
+                pipe.publish(settings.cache_invalidation_channel, order_id)
+        await pipe.execute()
+
+
+async def get_user_from_cache(email: str) -> Optional[Dict[str, Any]]:
+    """
+    Извлекает данные пользователя (id, email) из Redis по email.
+    """
+    cached = await redis_client.get(f"user:{email}")
+    return orjson.loads(cached) if cached else None
+
+
+async def set_user_to_cache(user_data: Dict[str, Any]) -> None:
+    """
+    Сохраняет данные пользователя (id, email) в Redis.
+
+    Кешируемые поля после регистрации не меняются, а удаления пользователей
+    в приложении нет, поэтому запись не инвалидируется и истекает только
+    по USER_CACHE_TTL_SECONDS.
+    """
+    await redis_client.set(
+        name=f"user:{user_data['email']}",
+        value=orjson.dumps(user_data),
+        ex=settings.user_cache_ttl_seconds
+    )
+
+
+async def get_order_stats_from_cache(user_id: int) -> Optional[bytes]:
+    """
+    Извлекает готовый JSON статистики заказов пользователя из Redis.
+    """
+    return await redis_client.get(f"order_stats:{user_id}")
+
+
+async def set_order_stats_to_cache(user_id: int, stats_data: bytes) -> None:
+    """
+    Сохраняет JSON статистики заказов пользователя в Redis.
+    """
+    await redis_client.set(f"order_stats:{user_id}", stats_data, ex=settings.order_stats_cache_ttl_seconds)
+
+
+async def delete_order_stats_cache(user_ids: Iterable[int]) -> None:
+    """
+    Удаляет статистику пользователей из кеша; вызывается после изменения их заказов.
+    """
+    keys = [f"order_stats:{user_id}" for user_id in set(user_ids)]
+    if keys:
+        await redis_client.delete(*keys)
+
+
+async def clear_order_stats_cache() -> None:
+    """
+    Удаляет статистику всех пользователей из кеша (после полного пересчёта).
+    """
+    batch = []
+    async for key in redis_client.scan_iter(match="order_stats:*", count=1000):
+        batch.append(key)
+        if len(batch) >= 1000:
+            await redis_client.delete(*batch)
+            batch = []
+    if batch:
+        await redis_client.delete(*batch)
+
+
+async def run_invalidation_listener() -> None:
+    """
+    Слушает канал инвалидации и удаляет заказы из локального уровня кеша.
+
+    После переподключения локальный кеш очищается целиком, так как сообщения,
+    пришедшие во время разрыва, потеряны.
+    """
+    if local_cache is None:
+        return
+
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(settings.cache_invalidation_channel)
+            local_cache.clear()
+            async for message in pubsub.listen():
+                local_cache.pop(message["data"].decode())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка подписки на инвалидацию кеша: {e}")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
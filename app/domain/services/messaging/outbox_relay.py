@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from app.core.config import settings
+from app.infrastructure.database.session import AsyncSessionLocal
+from app.infrastructure.repositories.outbox_repository import delete_events, fetch_pending_events
+from app.domain.services.messaging.rabbitmq_producer import RabbitMQPublisher, publisher
+
+# Инициализация логгера
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    """
+    Фоновый релей таблицы order_outbox в RabbitMQ.
+
+    Каждый воркер в своей транзакции захватывает пачку событий через
+    SELECT ... FOR UPDATE SKIP LOCKED, публикует её целиком и удаляет
+    отправленные строки. При ошибке публикации транзакция откатывается,
+    и события будут отправлены повторно (доставка "как минимум один раз").
+    """
+
+    def __init__(
+        self,
+        event_publisher: RabbitMQPublisher,
+        workers: int = settings.outbox_workers,
+        batch_size: int = settings.outbox_batch_size,
+        poll_interval: float = settings.outbox_poll_interval,
+    ):
+        self._publisher = event_publisher
+        self._workers = workers
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        """
+        Запускает воркеров релея в текущем event loop.
+        """
+        if self._tasks:
+            return
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run_worker(n), name=f"outbox-relay-{n}")
+            for n in range(self._workers)
+        ]
+        logger.info(f"Релей outbox запущен, воркеров: {self._workers}")
+
+    async def stop(self) -> None:
+        """
+        Останавливает воркеров, дожидаясь завершения текущих пачек.
+        """
+        if not self._tasks:
+            return
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def relay_batch(self) -> int:
+        """
+        Отправляет одну пачку событий. Возвращает число отправленных событий.
+        """
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                events = await fetch_pending_events(db, self._batch_size)
+                if not events:
+                    return 0
+
+                await self._publisher.publish_many([event.payload for event in events])
+                await delete_events(db, [event.id for event in events])
+        return len(events)
+
+    async def _run_worker(self, worker_id: int) -> None:
+        while not self._stopping.is_set():
+            try:
+                sent = await self.relay_batch()
+            except Exception as e:
+                logger.error(f"Релей outbox #{worker_id}: ошибка отправки пачки: {e}")
+                sent = 0
+
+            # Полная пачка — вероятно, есть ещё события, продолжаем без паузы
+            if sent < self._batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+
+# Экземпляр релея, запускается при старте приложения
+outbox_relay = OutboxRelay(publisher)
@@ -1,58 +1,218 @@
 
+import asyncio
 import json
 import logging
+from typing import List, Optional
+from uuid import UUID
 
 import aio_pika
+from aio_pika.abc import AbstractIncomingMessage
 
-from app.domain.services.tasks.celery_worker import process_order
+from app.domain.services.tasks.celery_worker import dispatch_orders
+from app.domain.services.messaging.rabbitmq_producer import ORDERS_QUEUE
 from app.core.config import settings
+from app.core.metrics import CONSUMED_MESSAGES, CONSUMER_BATCH_SIZE, CONSUMER_QUEUE_DEPTH
+
+# Период опроса глубины очереди для метрики отставания, сек
+QUEUE_DEPTH_INTERVAL = 5.0
+
+# Пауза перед перезапуском встроенного консьюмера после ошибки, сек
+CONSUMER_RESTART_DELAY = 5.0
 
 # Инициализация логгера для отслеживания состояния консьюмера
 logger = logging.getLogger(__name__)
 
 
-async def start_consumer():
+class OrderEventConsumer:
     """
-    Инициализирует асинхронного консьюмера RabbitMQ.
+    Асинхронный консьюмер очереди 'orders_queue'.
 
-    Подключается к очереди 'orders_queue', слушает входящие сообщения.
-    Если сообщение содержит событие 'new_order' — передаёт ID заказа в фоновую задачу Celery.
-
-    Исключения логируются как ошибки с подробностями.
+    Брокер отдаёт не более `prefetch_count` неподтверждённых сообщений.
+    Полученные сообщения разбирают `concurrency` обработчиков: каждый собирает
+    микропачку (до `batch_size` сообщений или `batch_timeout` секунд) и передаёт
+    её в Celery одной задачей process_orders со списком ID заказов. Блокирующая
+    публикация в Celery выполняется в потоке, чтобы не останавливать event loop.
     """
-    try:
-        # Подключение к RabbitMQ
+
+    def __init__(
+        self,
+        prefetch_count: int = settings.consumer_prefetch_count,
+        concurrency: int = settings.consumer_concurrency,
+        batch_size: int = settings.consumer_batch_size,
+        batch_timeout: float = settings.consumer_batch_timeout,
+    ):
+        self._prefetch_count = prefetch_count
+        self._concurrency = concurrency
+        self._batch_size = batch_size
+        self._batch_timeout = batch_timeout
+        self._buffer: Optional[asyncio.Queue] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def stop(self) -> None:
+        """
+        Запрашивает корректную остановку: run() прекращает приём новых сообщений,
+        дообрабатывает полученные и завершается.
+        """
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def run(self, drain_timeout: float = settings.consumer_drain_timeout) -> None:
+        """
+        Подключается к RabbitMQ и обрабатывает сообщения до вызова stop()
+        или отмены задачи.
+
+        При stop() подписка на очередь отменяется, уже полученные сообщения
+        обрабатываются не дольше `drain_timeout` секунд; неподтверждённые
+        к этому моменту сообщения брокер вернёт в очередь при закрытии канала.
+        """
+        self._stopping = asyncio.Event()
         connection = await aio_pika.connect_robust(
             host=settings.rabbitmq_host,
+            port=settings.rabbitmq_port,
             login=settings.rabbitmq_user,
             password=settings.rabbitmq_password
         )
-        channel = await connection.channel()
-
-        # Объявление очереди с надёжным сохранением сообщений
-        queue = await channel.declare_queue("orders_queue", durable=True)
-
-        logger.info("Consumer успешно подключён к 'orders_queue' и ожидает сообщения.")
-
-        # Асинхронный итератор по сообщениям
-        async with queue.iterator() as queue_iter:
-            async for message in queue_iter:
-                async with message.process():
-                    try:
-                        # Десериализация сообщения
-                        payload = json.loads(message.body.decode())
-                        order_id = payload.get("order_id")
-                        event_type = payload.get("event")
-
-                        # Обработка события 'new_order'
-                        if event_type == "new_order" and order_id:
-                            logger.info(f"Получено событие 'new_order' для заказа: {order_id}")
-                            process_order.delay(order_id)
-                        else:
-                            logger.warning(f"Неизвестное событие или отсутствует order_id: {payload}")
-
-                    except Exception as e:
-                        logger.error(f"Ошибка при обработке сообщения: {e}")
-
-    except Exception as conn_err:
-        logger.critical(f"Ошибка подключения к RabbitMQ: {conn_err}")
+        async with connection:
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=self._prefetch_count)
+
+            # Объявление очереди с надёжным сохранением сообщений
+            queue = await channel.declare_queue(ORDERS_QUEUE, durable=True)
+
+            self._buffer = asyncio.Queue(maxsize=self._prefetch_count)
+            workers = [asyncio.create_task(self._worker()) for _ in range(self._concurrency)]
+            workers.append(asyncio.create_task(self._report_queue_depth(queue)))
+
+            logger.info(
+                f"Consumer успешно подключён к '{ORDERS_QUEUE}' и ожидает сообщения "
+                f"(prefetch={self._prefetch_count}, обработчиков={self._concurrency})."
+            )
+            try:
+                consumer_tag = await queue.consume(self._buffer.put)
+                await self._stopping.wait()  # работаем до stop() или отмены
+
+                logger.info("Consumer останавливается: новые сообщения не принимаются")
+                await queue.cancel(consumer_tag)
+                try:
+                    await asyncio.wait_for(self._buffer.join(), timeout=drain_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Не все сообщения обработаны за {drain_timeout} с, остаток вернётся в очередь")
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _collect_batch(self) -> List[AbstractIncomingMessage]:
+        """
+        Ждёт первое сообщение и добирает пачку, пока не истечёт batch_timeout.
+        """
+        batch = [await self._buffer.get()]
+        deadline = asyncio.get_running_loop().time() + self._batch_timeout
+
+        while len(batch) < self._batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._buffer.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @staticmethod
+    async def _report_queue_depth(queue) -> None:
+        """
+        Периодически публикует в метрики число сообщений, ожидающих в очереди.
+        """
+        while True:
+            try:
+                declaration = await queue.declare()
+                CONSUMER_QUEUE_DEPTH.set(declaration.message_count)
+            except Exception as e:
+                logger.warning(f"Не удалось получить глубину очереди: {e}")
+            await asyncio.sleep(QUEUE_DEPTH_INTERVAL)
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            try:
+                await self._handle_batch(batch)
+            except Exception as e:
+                logger.error(f"Ошибка при обработке пачки сообщений: {e}")
+            finally:
+                for _ in batch:
+                    self._buffer.task_done()
+
+    async def _handle_batch(self, batch: List[AbstractIncomingMessage]) -> None:
+        """
+        Разбирает пачку и передаёт ID заказов из событий 'new_order' в Celery.
+
+        Некорректные сообщения подтверждаются и логируются. При ошибке отправки
+        в Celery сообщения пачки возвращаются в очередь.
+        """
+        order_ids = []
+        accepted = []
+
+        for message in batch:
+            try:
+                # Десериализация сообщения; order_id должен быть UUID, иначе одна
+                # ошибочная запись сорвала бы обработку всей пачки в Celery
+                payload = json.loads(message.body.decode())
+                order_id = payload.get("order_id")
+                event_type = payload.get("event")
+                if order_id:
+                    order_id = str(UUID(order_id))
+            except Exception as e:
+                logger.error(f"Ошибка при разборе сообщения: {e}")
+                CONSUMED_MESSAGES.labels("invalid").inc()
+                await message.ack()
+                continue
+
+            # Обработка события 'new_order'
+            if event_type == "new_order" and order_id:
+                order_ids.append(order_id)
+                accepted.append(message)
+            else:
+                logger.warning(f"Неизвестное событие или отсутствует order_id: {payload}")
+                CONSUMED_MESSAGES.labels("invalid").inc()
+                await message.ack()
+
+        if not order_ids:
+            return
+
+        try:
+            await asyncio.to_thread(dispatch_orders, order_ids)
+        except Exception as e:
+            logger.error(f"Ошибка отправки {len(order_ids)} заказов в Celery: {e}")
+            CONSUMED_MESSAGES.labels("requeued").inc(len(accepted))
+            for message in accepted:
+                await message.nack(requeue=True)
+            return
+
+        logger.info(f"Передано в Celery заказов: {len(order_ids)}")
+        CONSUMED_MESSAGES.labels("dispatched").inc(len(accepted))
+        CONSUMER_BATCH_SIZE.observe(len(order_ids))
+        for message in accepted:
+            await message.ack()
+
+
+async def start_consumer():
+    """
+    Инициализирует асинхронного консьюмера RabbitMQ.
+
+    Подключается к очереди 'orders_queue', слушает входящие сообщения.
+    Если сообщение содержит событие 'new_order' — передаёт ID заказа в фоновую задачу Celery.
+
+    Используется во встроенном режиме (CONSUMER_EMBEDDED=true). При ошибке
+    подключения или обработки консьюмер перезапускается через
+    CONSUMER_RESTART_DELAY секунд, а не останавливается молча.
+    """
+    while True:
+        try:
+            await OrderEventConsumer().run()
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as conn_err:
+            logger.critical(f"Ошибка консьюмера RabbitMQ, перезапуск через {CONSUMER_RESTART_DELAY} с: {conn_err}")
+            await asyncio.sleep(CONSUMER_RESTART_DELAY)
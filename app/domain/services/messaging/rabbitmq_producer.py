@@ -1,52 +1,127 @@
+import asyncio
 import json
 import logging
+from typing import Any, Dict, Iterable, Optional
 
 import aio_pika
 from aio_pika import DeliveryMode
+from aio_pika.abc import AbstractChannel, AbstractRobustConnection
+from aio_pika.pool import Pool
 
 from app.core.config import settings
+from app.core.metrics import PUBLISH_DURATION, PUBLISHED_MESSAGES
 
 # Инициализация логгера
 logger = logging.getLogger(__name__)
 
+# Очередь событий по заказам
+ORDERS_QUEUE = "orders_queue"
 
-async def publish_new_order_event(order_id: str) -> None:
+
+class RabbitMQPublisher:
     """
-    Публикует событие 'new_order' в очередь RabbitMQ.
-    Используется при создании нового заказа для последующей фоновой обработки через Celery.
+    Долгоживущий издатель сообщений RabbitMQ.
+
+    Держит одно надёжное соединение и пул каналов с подтверждениями публикации
+    (publisher confirms). Очередь объявляется один раз при подключении, а не на
+    каждое сообщение. Подтверждения ожидаются конвейерно: пачка сообщений
+    публикуется в канал целиком, после чего издатель ждёт все confirm разом.
     """
-    try:
-        # Устанавливаем асинхронное надёжное соединение с RabbitMQ
-        connection = await aio_pika.connect_robust(
-            host=settings.rabbitmq_host,
-            login=settings.rabbitmq_user,
-            password=settings.rabbitmq_password,
-        )
 
-        async with connection:
-            # Получение канала для обмена сообщениями
-            channel = await connection.channel()
+    def __init__(self, pool_size: int = settings.rabbitmq_channel_pool_size):
+        self._pool_size = pool_size
+        self._connection: Optional[AbstractRobustConnection] = None
+        self._channel_pool: Optional[Pool] = None
+        self._lock = asyncio.Lock()
 
-            # Убедимся, что очередь существует и устойчива к сбоям
-            await channel.declare_queue("orders_queue", durable=True)
+    async def connect(self) -> None:
+        """
+        Открывает соединение, создаёт пул каналов и объявляет очередь.
+        Повторный вызов при активном соединении ничего не делает.
+        """
+        async with self._lock:
+            if self._connection is not None:
+                return
 
-            # Формируем и сериализуем сообщение
-            message = aio_pika.Message(
-                body=json.dumps({
-                    "event": "new_order",
-                    "order_id": order_id
-                }).encode(),
-                delivery_mode=DeliveryMode.PERSISTENT  # сохраняется при сбоях брокера
+            connection = await aio_pika.connect_robust(
+                host=settings.rabbitmq_host,
+                port=settings.rabbitmq_port,
+                login=settings.rabbitmq_user,
+                password=settings.rabbitmq_password,
             )
+            channel_pool = Pool(self._open_channel, connection, max_size=self._pool_size)
+
+            # Очередь объявляется один раз на всё время жизни издателя
+            async with channel_pool.acquire() as channel:
+                await channel.declare_queue(ORDERS_QUEUE, durable=True)
+
+            self._connection = connection
+            self._channel_pool = channel_pool
+            logger.info(f"Издатель RabbitMQ подключён, пул каналов: {self._pool_size}")
+
+    async def close(self) -> None:
+        """
+        Закрывает пул каналов и соединение.
+        """
+        async with self._lock:
+            if self._channel_pool is not None:
+                await self._channel_pool.close()
+            if self._connection is not None:
+                await self._connection.close()
+            self._channel_pool = None
+            self._connection = None
+
+    @staticmethod
+    async def _open_channel(connection: AbstractRobustConnection) -> AbstractChannel:
+        return await connection.channel(publisher_confirms=True)
+
+    @staticmethod
+    def _build_message(payload: Dict[str, Any]) -> aio_pika.Message:
+        return aio_pika.Message(
+            body=json.dumps(payload).encode(),
+            content_type="application/json",
+            delivery_mode=DeliveryMode.PERSISTENT  # сохраняется при сбоях брокера
+        )
+
+    async def publish(self, payload: Dict[str, Any], routing_key: str = ORDERS_QUEUE) -> None:
+        """
+        Публикует одно сообщение и дожидается подтверждения брокера.
+        """
+        await self.publish_many([payload], routing_key=routing_key)
+
+    async def publish_many(
+        self,
+        payloads: Iterable[Dict[str, Any]],
+        routing_key: str = ORDERS_QUEUE
+    ) -> None:
+        """
+        Публикует пачку сообщений через один канал из пула.
+
+        Все сообщения отправляются без ожидания подтверждения каждого по отдельности,
+        затем ожидаются все confirm. Если брокер отклонил хотя бы одно сообщение,
+        выбрасывается исключение.
+        """
+        payloads = list(payloads)
+        try:
+            if self._channel_pool is None:
+                await self.connect()
+
+            with PUBLISH_DURATION.time():
+                async with self._channel_pool.acquire() as channel:
+                    await asyncio.gather(*(
+                        channel.default_exchange.publish(
+                            self._build_message(payload),
+                            routing_key=routing_key,
+                            timeout=settings.rabbitmq_publish_timeout,
+                        )
+                        for payload in payloads
+                    ))
+        except Exception:
+            PUBLISHED_MESSAGES.labels("failed").inc(len(payloads))
+            raise
+        PUBLISHED_MESSAGES.labels("confirmed").inc(len(payloads))
 
-            # Публикуем сообщение в очередь
-            await channel.default_exchange.publish(
-                message,
-                routing_key="orders_queue"
-            )
 
-            logger.info(f"Сообщение успешно отправлено: new_order — {order_id}")
+# Экземпляр издателя, запускается при старте приложения
+publisher = RabbitMQPublisher()
 
-    except Exception as e:
-        logger.error(f"Ошибка при отправке сообщения в RabbitMQ: {e}")
-        raise
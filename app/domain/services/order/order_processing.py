@@ -0,0 +1,74 @@
+import logging
+from typing import Dict, List, Set
+from uuid import UUID
+
+from app.core.metrics import PROCESSED_ORDERS
+from app.domain.services.cache.redis_cache import delete_order_stats_cache, delete_orders_cache
+from app.infrastructure.database.session import AsyncSessionLocal
+from app.infrastructure.models.order import Order, OrderStatus
+from app.infrastructure.repositories.order_repository import get_orders_by_ids, transition_orders_status
+
+# Инициализация логгера
+logger = logging.getLogger(__name__)
+
+
+def decide_status(order: Order) -> OrderStatus:
+    """
+    Бизнес-шаг обработки: заказ с позициями и положительной суммой
+    считается оплаченным, остальные отменяются.
+    """
+    if order.items and order.total_price > 0:
+        return OrderStatus.PAID
+    return OrderStatus.CANCELED
+
+
+async def process_orders_batch(order_ids: List[str]) -> Dict[str, int]:
+    """
+    Обрабатывает пачку новых заказов.
+
+    1. Загружает все заказы одним запросом (WHERE id = ANY).
+    2. Определяет новый статус каждого заказа в статусе PENDING.
+    3. Переводит статусы одним UPDATE ... RETURNING.
+    4. Сбрасывает кеш всех изменённых заказов одним конвейером Redis
+       и кеш статистики их владельцев. Ключи удаляются, а не перезаписываются,
+       чтобы запоздавшая запись не вернула в кеш устаревший статус.
+
+    Заказы, которые уже не в статусе PENDING, пропускаются — повторная
+    доставка той же пачки ничего не меняет. Некорректные ID пропускаются
+    с предупреждением и не мешают обработке остальных заказов.
+
+    :param order_ids: Идентификаторы заказов.
+    :return: Число заказов по итоговому статусу и пропущенных.
+    """
+    valid_ids: Set[UUID] = set()
+    for order_id in order_ids:
+        try:
+            valid_ids.add(UUID(order_id))
+        except (TypeError, ValueError, AttributeError):
+            logger.warning(f"Пропущен некорректный ID заказа: {order_id!r}")
+    ids = list(valid_ids)
+
+    async with AsyncSessionLocal() as db:
+        orders = await get_orders_by_ids(db, ids)
+
+        transitions: Dict[OrderStatus, List[UUID]] = {}
+        for order in orders:
+            if order.status == OrderStatus.PENDING:
+                transitions.setdefault(decide_status(order), []).append(order.id)
+
+        updated = await transition_orders_status(db, transitions)
+
+    # Кеш сбрасывается после коммита; ошибка Redis не откатывает обработку
+    try:
+        await delete_orders_cache(str(order.id) for order in updated)
+        await delete_order_stats_cache(order.user_id for order in updated)
+    except Exception as e:
+        logger.error(f"Ошибка сброса кеша обработанных заказов: {e}")
+
+    result: Dict[str, int] = {}
+    for order in updated:
+        result[order.status.value] = result.get(order.status.value, 0) + 1
+    for status, count in result.items():
+        PROCESSED_ORDERS.labels(status).inc(count)
+    result["skipped"] = len(ids) - len(updated)
+    return result
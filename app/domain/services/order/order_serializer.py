@@ -0,0 +1,28 @@
+from typing import Any, Dict
+
+import orjson
+
+from app.infrastructure.models.order import Order
+
+
+def order_to_dict(order: Order) -> Dict[str, Any]:
+    """
+    Представление заказа с теми же полями, что и схема OrderOut.
+    """
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "items": order.items,
+        "total_price": order.total_price,
+        "status": order.status,
+    }
+
+
+def encode_order(order: Order, newline: bool = False) -> bytes:
+    """
+    Сериализует заказ в JSON-байты через orjson (UUID и Enum кодируются нативно).
+
+    :param newline: Добавить перевод строки (для NDJSON)
+    """
+    option = orjson.OPT_APPEND_NEWLINE if newline else 0
+    return orjson.dumps(order_to_dict(order), option=option)
@@ -1,22 +1,59 @@
-from typing import List, Dict, Any
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional, Set, Tuple
 from uuid import UUID
 
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infrastructure.models.order import Order
-from app.schemas.order import OrderOut
+from app.core.config import settings
+from app.infrastructure.database.session import AsyncSessionLocal
+from app.infrastructure.database.replica import replica_router
+from app.infrastructure.models.order import Order, OrderStatus
 from app.infrastructure.repositories.order_repository import (
     create_order,
+    create_orders_bulk,
     update_order_status,
     get_order_by_id,
+    get_orders_by_ids,
     get_orders_by_user_id,
+    search_orders_by_sku,
+    stream_orders_by_user_id,
 )
-from app.domain.services.messaging.rabbitmq_producer import publish_new_order_event
+from app.domain.services.order.order_serializer import encode_order
+from app.domain.services.shared.cursor import encode_cursor, decode_cursor
+from app.domain.services.shared.single_flight import SingleFlight
+from app.domain.services.shared.read_your_writes import has_recent_write, mark_user_write
 from app.domain.services.cache.redis_cache import (
     get_order_from_cache,
+    get_order_from_cache_with_ttl,
+    get_orders_from_cache,
     set_order_to_cache,
+    set_orders_to_cache,
     delete_order_cache,
+    acquire_order_lock,
+    release_order_lock,
+    is_order_lock_held,
+    get_order_stats_from_cache,
+    set_order_stats_to_cache,
+    delete_order_stats_cache,
 )
+from app.infrastructure.repositories.order_stats_repository import get_order_stats
+
+# Инициализация логгера
+logger = logging.getLogger(__name__)
+
+# Схлопывание одновременных загрузок одного заказа из БД
+_order_loads = SingleFlight()
+
+# Фоновые задачи раннего обновления кеша (храним ссылки до завершения)
+_refresh_tasks: Set[asyncio.Task] = set()
+
+# Скользящее среднее времени загрузки заказа из БД, сек (delta в XFetch)
+_load_time = 0.01
 
 
 async def handle_order_creation(
@@ -26,34 +63,191 @@ async def handle_order_creation(
     total_price: float
 ) -> Order:
     """
-    Создает новый заказ в базе данных и публикует событие в очередь RabbitMQ.
+    Создает новый заказ в базе данных. Событие 'new_order' сохраняется в outbox
+    в той же транзакции и публикуется в RabbitMQ фоновым релеем.
+    Созданный заказ сразу кладётся в кеш: обычно его читают сразу после создания.
     """
     order = await create_order(db, user_id, items, total_price)
-    await publish_new_order_event(str(order.id))
+    await mark_user_write(user_id)
+    await _cache_created_orders([order])
+    await invalidate_order_stats([user_id])
     return order
 
 
+async def handle_bulk_order_creation(
+    db: AsyncSession,
+    user_id: int,
+    orders: List[Dict[str, Any]]
+) -> List[Order]:
+    """
+    Создает пачку заказов одним запросом к БД. События 'new_order' попадают
+    в outbox той же транзакцией и публикуются релеем пачками.
+    """
+    created = await create_orders_bulk(db, user_id, orders)
+    await mark_user_write(user_id)
+    await _cache_created_orders(created)
+    await invalidate_order_stats([user_id])
+    return created
+
+
+async def _cache_created_orders(orders: List[Order]) -> None:
+    """
+    Кладёт только что созданные заказы в кеш. Заказ уже сохранён в БД,
+    поэтому ошибка кеша не должна приводить к ошибке запроса.
+    """
+    try:
+        await set_orders_to_cache({str(order.id): encode_order(order) for order in orders})
+    except Exception as e:
+        logger.warning(f"Не удалось записать созданные заказы в кеш: {e}")
+
+
+async def invalidate_order_stats(user_ids: List[int]) -> None:
+    """
+    Сбрасывает кеш статистики пользователей после изменения их заказов.
+    Изменения уже зафиксированы, поэтому ошибка кеша только логируется:
+    устаревшая запись истечёт через ORDER_STATS_CACHE_TTL_SECONDS.
+    """
+    try:
+        await delete_order_stats_cache(user_ids)
+    except Exception as e:
+        logger.warning(f"Не удалось сбросить кеш статистики заказов: {e}")
+
+
 async def get_order_with_cache(
     db: AsyncSession,
     order_id: UUID
-) -> Dict[str, Any] | None:
+) -> bytes | None:
     """
     Получает заказ по ID. Сначала проверяет Redis, при отсутствии — загружает из БД и кэширует.
+    Возвращает готовый JSON заказа в виде байтов.
+
+    Одновременные промахи по одному ключу схлопываются: в БД идёт одна корутина,
+    остальные ждут её результат. Ключи, близкие к истечению TTL, с вероятностью
+    по схеме XFetch обновляются в фоне заранее.
     """
+    key = str(order_id)
+
     # Проверка наличия заказа в кеше
-    cached = await get_order_from_cache(str(order_id))
+    cached, ttl = await get_order_from_cache_with_ttl(key)
     if cached:
+        if ttl is not None and _should_refresh_early(ttl):
+            _schedule_refresh(order_id)
         return cached
 
-    # Получение заказа из БД
-    order = await get_order_by_id(db, order_id)
-    if not order:
-        return None
+    return await _order_loads.do(key, lambda: _load_order(db, order_id))
+
+
+async def get_orders_batch_with_cache(
+    db: AsyncSession,
+    order_ids: List[UUID]
+) -> List[bytes]:
+    """
+    Получает несколько заказов не более чем за три запроса: MGET из Redis,
+    один запрос в БД для промахов и один конвейер для записи их в кеш.
+
+    :return: JSON найденных заказов в порядке запроса (без дубликатов);
+             несуществующие заказы пропускаются
+    """
+    keys = list(dict.fromkeys(str(order_id) for order_id in order_ids))
+    found = await get_orders_from_cache(keys)
+
+    missing = [UUID(key) for key in keys if key not in found]
+    if missing:
+        loaded = {str(order.id): encode_order(order) for order in await get_orders_by_ids(db, missing)}
+        await set_orders_to_cache(loaded)
+        found.update(loaded)
+
+    return [found[key] for key in keys if key in found]
+
+
+def _should_refresh_early(ttl: float) -> bool:
+    """
+    XFetch: пересчитать значение заранее с вероятностью, растущей
+    по мере приближения к истечению TTL и со временем загрузки.
+    """
+    if settings.cache_xfetch_beta <= 0:
+        return False
+    return -_load_time * settings.cache_xfetch_beta * math.log(1.0 - random.random()) >= ttl
 
-    # Сериализация и сохранение в кеш
-    order_data = OrderOut.model_validate(order).model_dump()
-    await set_order_to_cache(str(order_id), order_data)
-    return order_data
+
+def _schedule_refresh(order_id: UUID) -> None:
+    """
+    Запускает фоновое обновление ключа, если оно ещё не идёт.
+    Используется отдельная сессия: сессия запроса к этому моменту будет закрыта.
+    """
+    key = str(order_id)
+    if _order_loads.in_flight(key):
+        return
+
+    async def refresh() -> None:
+        async with AsyncSessionLocal() as db:
+            await _order_loads.do(key, lambda: _load_order(db, order_id, use_lock=False))
+
+    task = asyncio.create_task(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_on_refresh_done)
+
+
+def _on_refresh_done(task: asyncio.Task) -> None:
+    _refresh_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Ошибка фонового обновления кеша заказа: {task.exception()}")
+
+
+async def _load_order(
+    db: AsyncSession,
+    order_id: UUID,
+    use_lock: bool = True
+) -> bytes | None:
+    """
+    Загружает заказ из БД и кладёт его в кеш.
+
+    При включённой межпроцессной блокировке загрузку выполняет только её
+    владелец; остальные процессы ждут появления значения в кеше и идут
+    в БД сами лишь по истечении таймаута блокировки.
+    """
+    global _load_time
+    key = str(order_id)
+    token = None
+
+    if use_lock and settings.cache_lock_enabled:
+        token = await acquire_order_lock(key)
+        if token is None:
+            cached = await _wait_for_cache(key)
+            if cached:
+                return cached
+
+    try:
+        # Получение заказа из БД
+        started = time.perf_counter()
+        order = await get_order_by_id(db, order_id)
+        _load_time = 0.9 * _load_time + 0.1 * (time.perf_counter() - started)
+        if not order:
+            return None
+
+        # Сериализация и сохранение в кеш
+        order_data = encode_order(order)
+        await set_order_to_cache(key, order_data)
+        return order_data
+    finally:
+        if token is not None:
+            await release_order_lock(key, token)
+
+
+async def _wait_for_cache(key: str) -> bytes | None:
+    """
+    Ожидает, пока владелец блокировки положит заказ в кеш.
+    Возвращает None, если блокировка снята без результата или истёк таймаут.
+    """
+    deadline = time.monotonic() + settings.cache_lock_timeout_ms / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+        cached = await get_order_from_cache(key)
+        if cached:
+            return cached
+        if not await is_order_lock_held(key):
+            break
+    return None
 
 
 async def update_order_status_service(
@@ -62,17 +256,118 @@ async def update_order_status_service(
     new_status: str
 ) -> None:
     """
-    Обновляет статус заказа в БД и очищает устаревший кеш.
+    Обновляет статус заказа в БД и сбрасывает его кеш.
+
+    Ключ удаляется, а не перезаписывается: безусловный SET после коммита
+    при параллельных изменениях одного заказа мог бы оставить в кеше
+    более старый статус на весь CACHE_TTL_SECONDS. Следующее чтение
+    загрузит заказ из БД.
+    """
+    order = await update_order_status(db, order_id, new_status)
+    await mark_user_write(order.user_id)
+    await _invalidate_order_cache(str(order_id))
+    await invalidate_order_stats([order.user_id])
+
+
+async def _invalidate_order_cache(order_id: str) -> None:
+    """
+    Сбрасывает кеш изменённого заказа. Изменение уже зафиксировано,
+    поэтому ошибка кеша только логируется.
     """
-    await update_order_status(db, order_id, new_status)
-    await delete_order_cache(str(order_id))
+    try:
+        await delete_order_cache(order_id)
+    except Exception as e:
+        logger.warning(f"Не удалось сбросить кеш заказа {order_id}: {e}")
+
+
+# Статусы, сумма которых считается тратами пользователя
+SPEND_STATUSES = (OrderStatus.PAID, OrderStatus.SHIPPED)
+
+
+async def get_user_order_stats_with_cache(db: AsyncSession, user_id: int) -> bytes:
+    """
+    Возвращает готовый JSON статистики заказов пользователя: число и сумму
+    заказов по статусам, общее число заказов и сумму трат (PAID и SHIPPED).
+
+    Статистика читается из сводной таблицы order_stats (не больше одной строки
+    на статус), а не пересчитывается по заказам, и кешируется в Redis.
+    """
+    cached = await get_order_stats_from_cache(user_id)
+    if cached:
+        return cached
+
+    by_status = {status.value: {"count": 0, "total": 0.0} for status in OrderStatus}
+    for row in await get_order_stats(db, user_id):
+        by_status[row.status.value] = {"count": row.count, "total": row.total}
+
+    stats_data = orjson.dumps({
+        "user_id": user_id,
+        "total_orders": sum(item["count"] for item in by_status.values()),
+        "lifetime_spend": sum(by_status[status.value]["total"] for status in SPEND_STATUSES),
+        "by_status": by_status,
+    })
+    await set_order_stats_to_cache(user_id, stats_data)
+    return stats_data
 
 
 async def get_user_orders_service(
     db: AsyncSession,
-    user_id: int
-) -> List[Order]:
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Order], Optional[str]]:
     """
-    Возвращает список всех заказов, принадлежащих пользователю.
+    Возвращает страницу заказов пользователя и курсор следующей страницы
+    (None, если страница последняя). Некорректный курсор — ValueError.
     """
-    return await get_orders_by_user_id(db, user_id)
+    after = decode_cursor(cursor) if cursor else None
+
+    # Запрашиваем на одну строку больше, чтобы узнать, есть ли следующая страница
+    orders = await get_orders_by_user_id(db, user_id, limit + 1, after)
+    if len(orders) <= limit:
+        return orders, None
+
+    orders = orders[:limit]
+    last = orders[-1]
+    return orders, encode_cursor(last.created_at, last.id)
+
+
+async def search_orders_by_sku_service(
+    db: AsyncSession,
+    sku: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None
+) -> Tuple[List[Order], Optional[str]]:
+    """
+    Возвращает страницу заказов с товаром `sku` и курсор следующей страницы.
+    При заданном `user_id` поиск ограничен заказами пользователя.
+    Некорректный курсор — ValueError.
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    orders = await search_orders_by_sku(db, sku, limit + 1, after, user_id)
+    if len(orders) <= limit:
+        return orders, None
+
+    orders = orders[:limit]
+    last = orders[-1]
+    return orders, encode_cursor(last.created_at, last.id)
+
+
+async def export_user_orders_ndjson(user_id: int) -> AsyncIterator[bytes]:
+    """
+    Потоковый экспорт всех заказов пользователя в NDJSON.
+
+    Сессия открывается внутри генератора: StreamingResponse читает его уже после
+    завершения зависимостей запроса, когда сессия из get_db закрыта.
+    Экспорт читается с реплики, если она доступна и пользователь недавно
+    ничего не записывал (read-your-writes, как в get_read_db).
+    """
+    session = None
+    if replica_router.enabled and not await has_recent_write(user_id):
+        session = replica_router.pick_session()
+
+    async with session or AsyncSessionLocal() as db:
+        async for orders in stream_orders_by_user_id(db, user_id, settings.orders_export_batch_size):
+            yield b"".join(encode_order(order, newline=True) for order in orders)
@@ -0,0 +1,25 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+
+def encode_cursor(created_at: datetime, order_id: UUID) -> str:
+    """
+    Кодирует позицию keyset-пагинации (created_at, id) в непрозрачную строку.
+    """
+    raw = f"{created_at.isoformat()}|{order_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Декодирует курсор, полученный от encode_cursor.
+    Бросает ValueError, если курсор повреждён.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(order_id)
+    except Exception as e:
+        raise ValueError("Некорректный курсор пагинации") from e
@@ -1,12 +1,171 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Tuple
 
-#  Инициализация rate limiter по IP-адресу
-limiter = Limiter(
-    key_func=get_remote_address
-)
+from fastapi import Request
+
+from app.core.config import settings
+from app.domain.services.auth.principal_cache import peek_principal
+from app.domain.services.cache.redis_cache import redis_client
+from app.domain.services.shared.lru_cache import LRUCache
+
+# Инициализация логгера
+logger = logging.getLogger(__name__)
+
+# Единицы периода в строках лимитов ("100/minute")
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# GCRA (generic cell rate algorithm) одной атомарной операцией.
+# Ключ хранит теоретическое время прихода (TAT) следующего запроса в мс.
+# ARGV: интервал между запросами (мс), допустимый всплеск (мс), число токенов.
+# Возвращает {1, 0}, если токены выданы, иначе {0, мс до повторной попытки}.
+_GCRA_SCRIPT = """
+local now = redis.call("TIME")
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local tat = tonumber(redis.call("GET", KEYS[1]))
+if tat == nil or tat < now_ms then
+    tat = now_ms
+end
+
+local new_tat = tat + emission * cost
+local allow_at = new_tat - tolerance
+if allow_at > now_ms then
+    return {0, allow_at - now_ms}
+end
+
+redis.call("SET", KEYS[1], new_tat, "PX", math.max(1, math.ceil(new_tat - now_ms)))
+return {1, 0}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Лимит запросов: `limit` запросов за `period` секунд.
+    """
+    limit: int
+    period: float
+
+    @property
+    def emission_ms(self) -> float:
+        return self.period * 1000 / self.limit
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """
+        Разбирает строку вида "100/minute" или "5/second".
+        """
+        count, unit = value.strip().split("/", 1)
+        return cls(limit=int(count), period=_PERIODS[unit.strip().rstrip("s")])
+
+
+class RateLimitExceeded(Exception):
+    """
+    Лимит запросов исчерпан.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__("Rate limit exceeded")
+        self.retry_after = retry_after
+
+
+class RedisRateLimiter:
+    """
+    Ограничитель частоты запросов, общий для всех воркеров и реплик.
+
+    Каждая проверка — один вызов Lua-скрипта GCRA в Redis. Для активных
+    клиентов токены выдаются пачкой (`lease_size`) и расходуются локально,
+    поэтому Redis получает одно обращение на несколько запросов. Неизрасходованная
+    пачка сгорает через один интервал эмиссии на токен, что немного ужесточает
+    лимит, но не позволяет его превысить. При недоступности Redis запросы пропускаются.
+    """
+
+    def __init__(self, lease_size: int = settings.rate_limit_lease_size):
+        self._lease_size = lease_size
+        self._script = redis_client.register_script(_GCRA_SCRIPT)
+        # Ключ -> [оставшиеся токены, срок действия пачки, время последнего запроса]
+        self._leases = LRUCache(max_size=100_000, ttl=60)
+
+    async def hit(self, key: str, rate: RateLimit) -> Tuple[bool, float]:
+        """
+        Списывает один токен для ключа.
+
+        :return: (разрешено, секунд до повторной попытки)
+        """
+        now = time.monotonic()
+        lease = self._leases.get(key)
+
+        if lease is not None and lease[0] > 0 and lease[1] > now:
+            lease[0] -= 1
+            lease[2] = now
+            return True, 0.0
+
+        # Пачку берём только для клиентов, обращавшихся совсем недавно
+        hot = lease is not None and now - lease[2] < 1.0
+        cost = max(1, min(self._lease_size, rate.limit // 10)) if hot else 1
+
+        try:
+            allowed, retry_after_ms = await self._acquire(key, rate, cost)
+            if not allowed and cost > 1:
+                cost = 1
+                allowed, retry_after_ms = await self._acquire(key, rate, cost)
+        except Exception as e:
+            logger.error(f"Rate limiter недоступен, запрос пропущен: {e}")
+            return True, 0.0
+
+        if not allowed:
+            self._leases.set(key, [0, now, now])
+            return False, retry_after_ms / 1000
+
+        self._leases.set(key, [cost - 1, now + rate.emission_ms * cost / 1000, now])
+        return True, 0.0
+
+    async def _acquire(self, key: str, rate: RateLimit, cost: int) -> Tuple[bool, float]:
+        allowed, retry_after_ms = await self._script(
+            keys=[f"rl:{key}"],
+            args=[rate.emission_ms, rate.period * 1000, cost],
+        )
+        return bool(allowed), float(retry_after_ms)
+
+
+limiter = RedisRateLimiter()
 """
-Limiter используется для ограничения частоты запросов
-на уровне FastAPI middleware. Настройки лимита можно задавать
-на уровне маршрутов через декоратор @limiter.limit("100/minute")
+Limiter используется для ограничения частоты запросов на уровне маршрутов
+через зависимость rate_limit("<маршрут>"). Лимиты задаются в настройках:
+RATE_LIMIT — по умолчанию, RATE_LIMIT_ROUTES_RAW — для отдельных маршрутов.
 """
+
+
+def _client_identity(request: Request) -> str:
+    """
+    Ключ клиента: id пользователя из JWT, иначе IP-адрес.
+    """
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        principal = peek_principal(authorization[7:])
+        if principal is not None:
+            return f"u:{principal.id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def rate_limit(scope: str) -> Callable:
+    """
+    Создаёт зависимость FastAPI, ограничивающую частоту запросов к маршруту.
+
+    :param scope: Имя маршрута для настроек RATE_LIMIT_ROUTES_RAW, например "orders:create"
+    """
+    rate = RateLimit.parse(settings.rate_limit_routes.get(scope, settings.rate_limit))
+
+    async def dependency(request: Request) -> None:
+        if not settings.rate_limit_enabled:
+            return
+        allowed, retry_after = await limiter.hit(f"{scope}:{_client_identity(request)}", rate)
+        if not allowed:
+            raise RateLimitExceeded(retry_after)
+
+    return dependency
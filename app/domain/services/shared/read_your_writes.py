@@ -0,0 +1,42 @@
+import logging
+
+from app.core.config import settings
+from app.domain.services.cache.redis_cache import redis_client
+from app.domain.services.shared.lru_cache import LRUCache
+
+# Инициализация логгера
+logger = logging.getLogger(__name__)
+
+# Пользователи, недавно писавшие через этот процесс
+_recent_writers = LRUCache(max_size=100_000, ttl=settings.read_your_writes_seconds)
+
+
+async def mark_user_write(user_id: int) -> None:
+    """
+    Отмечает запись пользователя: в течение READ_YOUR_WRITES_SECONDS его чтения
+    идут на primary, чтобы он видел свои изменения несмотря на отставание реплик.
+    Отметка видна всем процессам через Redis. Без реплик ничего не делает.
+    """
+    if not settings.db_replica_urls:
+        return
+
+    _recent_writers.set(user_id, True)
+    try:
+        await redis_client.set(
+            f"ryw:{user_id}", 1, px=int(settings.read_your_writes_seconds * 1000)
+        )
+    except Exception as e:
+        logger.error(f"Не удалось сохранить отметку записи пользователя {user_id}: {e}")
+
+
+async def has_recent_write(user_id: int) -> bool:
+    """
+    Проверяет, писал ли пользователь недавно. При недоступности Redis
+    возвращает True, чтобы чтение ушло на primary.
+    """
+    if _recent_writers.get(user_id):
+        return True
+    try:
+        return bool(await redis_client.exists(f"ryw:{user_id}"))
+    except Exception:
+        return True
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Схлопывание одновременных запросов (single-flight) в пределах процесса.
+
+    Пока для ключа выполняется загрузка, остальные корутины с тем же ключом
+    не запускают свою, а ждут результат первой. Если первая корутина была
+    отменена, ожидающие повторяют попытку сами.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет `fn` для ключа или присоединяется к уже идущему вызову.
+        """
+        while key in self._calls:
+            future = self._calls[key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Отменили ведущую корутину, а не нас — пробуем загрузить сами
+                if future.cancelled() and not _current_task_cancelling():
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # помечаем исключение как полученное
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+def _current_task_cancelling() -> bool:
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
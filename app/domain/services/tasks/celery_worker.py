@@ -1,6 +1,22 @@
+import asyncio
+import os
 import time
+from typing import Dict, List, Optional
+
 from celery import Celery
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+)
+from prometheus_client import start_http_server
+
 from app.core.config import settings
+from app.core.metrics import CELERY_TASK_DURATION, mark_process_dead
+from app.domain.services.order.order_processing import process_orders_batch
+from app.infrastructure.database.session import engine
 
 # Инициализация экземпляра Celery с настройками брокера (RabbitMQ).
 # Этот экземпляр используется для регистрации и выполнения фоновых задач.
@@ -12,10 +28,93 @@ celery_app = Celery(
     ),
 )
 
+# Задача подтверждается после выполнения: при падении процесса пачка
+# вернётся в очередь (обработка идемпотентна). Prefetch ограничивает число
+# пачек, забираемых процессом заранее.
+celery_app.conf.update(
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=settings.celery_prefetch_multiplier,
+)
+
+# Event loop процесса-воркера. Пул соединений БД и клиент Redis привязываются
+# к нему при первом использовании, поэтому цикл создаётся один раз на процесс
+# и переиспользуется всеми задачами.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _run(coro):
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs):
+    # Соединения, унаследованные от родительского процесса, не используются после fork
+    engine.sync_engine.dispose(close=False)
+
+
+@celery_app.task
+def process_orders(order_ids: List[str]) -> Dict[str, int]:
+    """
+    Фоновая задача обработки пачки заказов: загрузка одним запросом,
+    массовый перевод статусов и обновление кеша одним конвейером.
+    """
+    return _run(process_orders_batch(order_ids))
+
+
 @celery_app.task
-def process_order(order_id: str):
+def process_order(order_id: str) -> Dict[str, int]:
     """
-    Фоновая задача обработки заказа.
+    Обработка одного заказа. Оставлена для сообщений, поставленных
+    в очередь до перехода на пачки.
     """
-    time.sleep(2)  # Эмуляция длительной бизнес-операции
-    print(f"Order {order_id} processed")
+    return process_orders(order_ids=[order_id])
+
+
+def dispatch_orders(order_ids: List[str]) -> None:
+    """
+    Отправляет пачку заказов на обработку одной задачей Celery.
+    Вызов блокирующий — из asyncio-кода его следует выполнять в отдельном потоке.
+    """
+    process_orders.delay(order_ids)
+
+
+# Время старта выполняемых задач по task_id
+_task_started: Dict[str, float] = {}
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+
+
+@worker_ready.connect
+def _start_metrics_server(**kwargs):
+    """
+    Поднимает HTTP-сервер метрик в главном процессе воркера. Дочерние процессы
+    prefork пишут метрики в PROMETHEUS_MULTIPROC_DIR, откуда они собираются здесь.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(settings.celery_metrics_port, registry=registry)
+    else:
+        start_http_server(settings.celery_metrics_port)
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs):
+    mark_process_dead()
@@ -0,0 +1,103 @@
+import asyncio
+import itertools
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.infrastructure.database.session import create_engine_from_settings
+
+# Инициализация логгера
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """
+    Распределяет чтение по репликам PostgreSQL по кругу (round-robin).
+
+    Доступность реплик проверяется фоновой задачей; недоступные реплики
+    исключаются из ротации до следующей успешной проверки. Если доступных
+    реплик нет, pick_session возвращает None и чтение идёт на primary.
+    """
+
+    def __init__(self, urls: List[str]):
+        self._engines = [create_engine_from_settings(url) for url in urls]
+        self._session_factories = [
+            async_sessionmaker(bind=engine, expire_on_commit=False)
+            for engine in self._engines
+        ]
+        self._names = [make_url(url).render_as_string(hide_password=True) for url in urls]
+        self._healthy = [True] * len(urls)
+        self._counter = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._engines)
+
+    def pick_session(self) -> Optional[AsyncSession]:
+        """
+        Открывает сессию к следующей доступной реплике или возвращает None.
+        """
+        healthy = [i for i, ok in enumerate(self._healthy) if ok]
+        if not healthy:
+            return None
+        index = healthy[next(self._counter) % len(healthy)]
+        return self._session_factories[index]()
+
+    def start_health_checks(self) -> None:
+        """
+        Запускает периодическую проверку реплик в текущем event loop.
+        """
+        if self.enabled and self._health_task is None:
+            self._health_task = asyncio.create_task(self._run_health_checks())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for engine in self._engines:
+            await engine.dispose()
+
+    async def check_health(self) -> None:
+        """
+        Выполняет SELECT 1 на каждой реплике и обновляет их состояние.
+        """
+        results = await asyncio.gather(
+            *(self._ping(engine) for engine in self._engines),
+            return_exceptions=True
+        )
+        for index, result in enumerate(results):
+            healthy = result is True
+            if healthy != self._healthy[index]:
+                state = "доступна" if healthy else f"недоступна ({result})"
+                logger.warning(f"Реплика {self._names[index]} {state}")
+            self._healthy[index] = healthy
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        return [
+            {"replica": name, "healthy": healthy}
+            for name, healthy in zip(self._names, self._healthy)
+        ]
+
+    @staticmethod
+    async def _ping(engine) -> bool:
+        async with asyncio.timeout(settings.db_replica_health_interval):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        return True
+
+    async def _run_health_checks(self) -> None:
+        while True:
+            await asyncio.sleep(settings.db_replica_health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"Ошибка проверки реплик: {e}")
+
+
+# Маршрутизатор чтения; без DB_REPLICA_URLS_RAW все запросы идут на primary
+replica_router = ReplicaRouter(settings.db_replica_urls)
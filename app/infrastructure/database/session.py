@@ -1,4 +1,10 @@
+import asyncio
+from typing import Any, Dict
+
+from sqlalchemy import text
+
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
@@ -7,17 +13,40 @@ from sqlalchemy.ext.asyncio import (
 from app.core.config import settings
 
 # Формирование строки подключения к PostgreSQL (используется asyncpg)
-DATABASE_URL = (
-    f"postgresql+asyncpg://{settings.db_user}:{settings.db_password}"
-    f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
-)
+DATABASE_URL = settings.database_url
+
+
+def create_engine_from_settings(url: str = DATABASE_URL) -> AsyncEngine:
+    """
+    Создаёт асинхронный движок SQLAlchemy с профилем из настроек.
+
+    Каждый процесс держит до db_pool_size + db_max_overflow соединений:
+    при нескольких воркерах это число умножается на их количество и
+    должно укладываться в max_connections PostgreSQL.
+    """
+    return create_async_engine(
+        url,
+        echo=settings.db_echo,  # Вывод SQL-запросов в лог только для отладки
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={
+            # Кеш подготовленных запросов asyncpg и диалекта SQLAlchemy
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "command_timeout": settings.db_command_timeout,
+            "server_settings": {
+                "statement_timeout": str(settings.db_statement_timeout_ms),
+                "application_name": settings.db_application_name,
+            },
+        },
+    )
+
 
 # Инициализация асинхронного движка SQLAlchemy
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,  # Вывод SQL-запросов в лог для отладки
-    future=True
-)
+engine = create_engine_from_settings()
 
 # Асинхронная фабрика сессий
 AsyncSessionLocal = async_sessionmaker(
@@ -26,6 +55,56 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+def get_pool_stats(db_engine: AsyncEngine = engine) -> Dict[str, Any]:
+    """
+    Возвращает текущую загрузку пула соединений движка.
+    """
+    pool = db_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.db_max_overflow,
+    }
+
+
+async def warm_up_pool(db_engine: AsyncEngine = engine, connections: int = settings.db_pool_warmup) -> None:
+    """
+    Открывает заранее до `connections` соединений пула (не больше db_pool_size),
+    чтобы первые запросы процесса не ждали установки соединения с PostgreSQL.
+    """
+    connections = min(connections, settings.db_pool_size)
+    if connections <= 0:
+        return
+
+    # Соединения удерживаются, пока не откроются все (или не завершатся ошибкой),
+    # иначе пул переиспользовал бы одно и то же
+    all_arrived = asyncio.Event()
+    arrived = 0
+
+    def arrive() -> None:
+        nonlocal arrived
+        arrived += 1
+        if arrived == connections:
+            all_arrived.set()
+
+    async def hold() -> None:
+        try:
+            connection = await db_engine.connect()
+        except Exception:
+            arrive()
+            raise
+        async with connection:
+            try:
+                await connection.execute(text("SELECT 1"))
+            finally:
+                arrive()
+            await all_arrived.wait()
+
+    await asyncio.gather(*(hold() for _ in range(connections)))
+
+
 async def get_db() -> AsyncSession:
     """
     Возвращает асинхронную сессию к базе данных.
@@ -2,8 +2,8 @@ from datetime import datetime
 from uuid import uuid4
 
 
-from sqlalchemy import Column, ForeignKey, JSON, Float, Enum as SqlEnum, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, ForeignKey, Float, Enum as SqlEnum, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 from app.infrastructure.database.base import Base
 from app.domain.enums.order_status import OrderStatus
@@ -16,7 +16,7 @@ class Order(Base):
     Атрибуты:
         id (UUID): Уникальный идентификатор заказа.
         user_id (int): Идентификатор пользователя, сделавшего заказ.
-        items (JSON): Список заказанных товаров в формате JSON.
+        items (JSONB): Список заказанных товаров в формате JSON.
         total_price (float): Общая стоимость заказа.
         status (OrderStatus): Статус текущего заказа.
         created_at (datetime): Дата и время создания заказа.
@@ -26,7 +26,14 @@ class Order(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id = Column(ForeignKey("users.id"), nullable=False)
 
-    items = Column(JSON, nullable=False)
+    items = Column(JSONB, nullable=False)
     total_price = Column(Float, nullable=False)
     status = Column(SqlEnum(OrderStatus, name="order_status"), default=OrderStatus.PENDING)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Индекс под keyset-пагинацию заказов пользователя
+        Index("ix_orders_user_id_created_at_id", user_id, created_at.desc(), id),
+        # Индекс под запросы вхождения items @> '[{"sku": ...}]'
+        Index("ix_orders_items_gin", items, postgresql_using="gin", postgresql_ops={"items": "jsonb_path_ops"}),
+    )
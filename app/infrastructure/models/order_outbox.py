@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, JSON, String
+
+from app.infrastructure.database.base import Base
+
+
+class OrderOutbox(Base):
+    """
+    Модель таблицы исходящих событий по заказам (transactional outbox).
+
+    Строка пишется в той же транзакции, что и сам заказ, и удаляется
+    фоновым релеем после успешной публикации в RabbitMQ.
+
+    Атрибуты:
+        id (int): Порядковый номер события.
+        event (str): Тип события, например 'new_order'.
+        payload (JSON): Тело сообщения для брокера.
+        created_at (datetime): Дата и время создания события.
+    """
+    __tablename__ = "order_outbox"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    event = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
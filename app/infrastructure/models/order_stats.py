@@ -0,0 +1,25 @@
+from sqlalchemy import BigInteger, Column, Enum as SqlEnum, Float, ForeignKey
+
+from app.infrastructure.database.base import Base
+from app.domain.enums.order_status import OrderStatus
+
+
+class OrderStats(Base):
+    """
+    Модель сводной таблицы заказов пользователя по статусам.
+
+    Строки обновляются приращениями в той же транзакции, что и заказы,
+    поэтому статистика пользователя читается без обхода его заказов.
+
+    Атрибуты:
+        user_id (int): Идентификатор пользователя.
+        status (OrderStatus): Статус заказов.
+        count (int): Число заказов в статусе.
+        total (float): Сумма заказов в статусе.
+    """
+    __tablename__ = "order_stats"
+
+    user_id = Column(ForeignKey("users.id"), primary_key=True)
+    status = Column(SqlEnum(OrderStatus, name="order_status"), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0)
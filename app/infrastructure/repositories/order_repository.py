@@ -1,14 +1,24 @@
-from typing import List, Optional, Dict
+from typing import AsyncIterator, List, Optional, Dict, Sequence, Tuple
 from uuid import UUID, uuid4
 from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import and_, any_, case, delete, insert, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.exc import NoResultFound
 
 from app.infrastructure.models.order import Order, OrderStatus
+from app.core.metrics import track_repository
+from app.infrastructure.repositories.outbox_repository import add_outbox_events, new_order_event
+from app.infrastructure.repositories.order_stats_repository import (
+    apply_stats_delta,
+    orders_created_delta,
+    orders_deleted_delta,
+    orders_moved_delta,
+)
 
 
+@track_repository
 async def create_order(
     db: AsyncSession,
     user_id: int,
@@ -17,6 +27,8 @@ async def create_order(
 ) -> Order:
     """
     Создаёт новый заказ и сохраняет его в базе данных.
+    Событие 'new_order' и приращение статистики пользователя
+    записываются в той же транзакции.
     """
     # Формирование объекта заказа с автогенерацией UUID и текущей датой
     order = Order(
@@ -28,8 +40,10 @@ async def create_order(
         created_at=datetime.utcnow()
     )
 
-    # Добавление и фиксация изменений в БД
+    # Добавление заказа, события в outbox и статистики, фиксация одной транзакцией
     db.add(order)
+    await add_outbox_events(db, [new_order_event(str(order.id))])
+    await apply_stats_delta(db, orders_created_delta([order]))
     await db.commit()
 
     # Обновление объекта заказа из БД (например, если есть значения по умолчанию от сервера)
@@ -37,6 +51,46 @@ async def create_order(
     return order
 
 
+@track_repository
+async def create_orders_bulk(
+    db: AsyncSession,
+    user_id: int,
+    orders: List[Dict]
+) -> List[Order]:
+    """
+    Создаёт пачку заказов одним многострочным INSERT ... RETURNING.
+    События 'new_order' для всех заказов и приращение статистики пользователя
+    пишутся в той же транзакции.
+
+    :param orders: Список словарей с ключами items и total_price
+    :return: Созданные заказы в порядке входного списка
+    """
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "items": order["items"],
+            "total_price": order["total_price"],
+            "status": OrderStatus.PENDING,
+            "created_at": created_at,
+        }
+        for order in orders
+    ]
+
+    result = await db.scalars(
+        insert(Order).returning(Order, sort_by_parameter_order=True),
+        rows
+    )
+    created = result.all()
+
+    await add_outbox_events(db, [new_order_event(str(row["id"])) for row in rows])
+    await apply_stats_delta(db, orders_created_delta(created))
+    await db.commit()
+    return created
+
+
+@track_repository
 async def get_order_by_id(db: AsyncSession, order_id: UUID) -> Optional[Order]:
     """
     Получает заказ по его UUID.
@@ -46,31 +100,216 @@ async def get_order_by_id(db: AsyncSession, order_id: UUID) -> Optional[Order]:
     return result.scalar_one_or_none()
 
 
-async def update_order_status(db: AsyncSession, order_id: UUID, new_status: str) -> None:
+@track_repository
+async def get_orders_by_ids(db: AsyncSession, order_ids: List[UUID]) -> List[Order]:
+    """
+    Получает несколько заказов одним запросом WHERE id = ANY(:ids).
+    Массив передаётся одним параметром, поэтому текст запроса не зависит
+    от числа ID и подготовленный запрос переиспользуется.
+    """
+    result = await db.execute(
+        select(Order).where(Order.id == any_(literal(order_ids, ARRAY(PG_UUID(as_uuid=True)))))
+    )
+    return result.scalars().all()
+
+
+@track_repository
+async def update_order_status(db: AsyncSession, order_id: UUID, new_status: str) -> Order:
     """
-    Обновляет статус заказа. Бросает исключение, если заказ не найден.
+    Обновляет статус заказа и возвращает его актуальное состояние
+    за один запрос (UPDATE ... RETURNING). Бросает исключение, если заказ не найден.
+
+    Прежний статус читается в том же запросе (CTE с FOR UPDATE) и нужен
+    для приращения статистики пользователя в той же транзакции.
     """
+    # Прежний статус строки, заблокированной до конца транзакции
+    old = (
+        select(Order.id, Order.status.label("old_status"))
+        .where(Order.id == order_id)
+        .with_for_update()
+        .cte("old")
+    )
+
     # Создаём SQL выражение на обновление статуса по ID
     stmt = (
         update(Order)
-        .where(Order.id == order_id)
+        .where(Order.id == old.c.id)
         .values(status=new_status)
-        .execution_options(synchronize_session="fetch")
+        .returning(Order, old.c.old_status)
+        .execution_options(synchronize_session=False, populate_existing=True)
     )
 
-    # Выполняем обновление и проверяем, были ли затронуты строки
+    # Выполняем обновление и проверяем, была ли затронута строка
     result = await db.execute(stmt)
-    if result.rowcount == 0:
+    row = result.one_or_none()
+    if row is None:
         raise NoResultFound
+    order, old_status = row
 
-    # Фиксируем изменения
+    # Статистика и изменения фиксируются вместе
+    await apply_stats_delta(db, orders_moved_delta([(order, old_status)]))
     await db.commit()
+    return order
 
 
-async def get_orders_by_user_id(db: AsyncSession, user_id: int) -> List[Order]:
+@track_repository
+async def delete_order(db: AsyncSession, order_id: UUID) -> bool:
     """
-    Возвращает список заказов, принадлежащих пользователю.
+    Удаляет заказ (DELETE ... RETURNING) и вычитает его из статистики
+    пользователя в той же транзакции.
+
+    :return: True, если заказ был удалён.
     """
-    # Выполняем запрос для получения всех заказов пользователя
-    result = await db.execute(select(Order).where(Order.user_id == user_id))
+    result = await db.execute(
+        delete(Order)
+        .where(Order.id == order_id)
+        .returning(Order)
+        .execution_options(synchronize_session=False)
+    )
+    order = result.scalar_one_or_none()
+    if order is None:
+        return False
+
+    await apply_stats_delta(db, orders_deleted_delta([order]))
+    await db.commit()
+    return True
+
+
+@track_repository
+async def transition_orders_status(
+    db: AsyncSession,
+    transitions: Dict[OrderStatus, List[UUID]],
+    from_status: OrderStatus = OrderStatus.PENDING
+) -> List[Order]:
+    """
+    Переводит пачку заказов в новые статусы одним запросом
+    UPDATE ... SET status = CASE ... WHERE id = ANY(:ids) AND status = :from RETURNING.
+
+    Заказы, уже ушедшие из `from_status` (обработаны ранее или изменены вручную),
+    не затрагиваются, поэтому повторная обработка пачки безопасна. Приращение
+    статистики применяется в той же транзакции.
+
+    :param transitions: Новый статус -> ID заказов.
+    :param from_status: Статус, из которого допускается переход.
+    :return: Обновлённые заказы.
+    """
+    transitions = {status: ids for status, ids in transitions.items() if ids}
+    if not transitions:
+        return []
+
+    uuid_array = ARRAY(PG_UUID(as_uuid=True))
+    status_type = Order.__table__.c.status.type
+    all_ids = [order_id for ids in transitions.values() for order_id in ids]
+
+    stmt = (
+        update(Order)
+        .where(Order.id == any_(literal(all_ids, uuid_array)), Order.status == from_status)
+        .values(status=case(
+            *(
+                (Order.id == any_(literal(ids, uuid_array)), literal(status, status_type))
+                for status, ids in transitions.items()
+            ),
+            else_=Order.status,
+        ))
+        .returning(Order)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    orders = result.scalars().all()
+    await apply_stats_delta(db, orders_moved_delta((order, from_status) for order in orders))
+    await db.commit()
+    return orders
+
+
+def _after_cursor(after: Tuple[datetime, UUID]):
+    """
+    Условие keyset-пагинации по (created_at DESC, id): строки после позиции `after`.
+
+    Избыточная граница created_at <= :created_at становится условием индекса,
+    и сканирование начинается с позиции курсора. Без неё OR применяется как
+    фильтр, и каждая страница читает индекс с самых новых строк.
+    """
+    created_at, order_id = after
+    return and_(
+        Order.created_at <= created_at,
+        or_(
+            Order.created_at < created_at,
+            and_(Order.created_at == created_at, Order.id > order_id),
+        ),
+    )
+
+
+@track_repository
+async def get_orders_by_user_id(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, UUID]] = None
+) -> List[Order]:
+    """
+    Возвращает страницу заказов пользователя, от новых к старым.
+
+    Пагинация keyset по (created_at DESC, id): `after` — позиция последнего
+    заказа предыдущей страницы. Запрос обслуживается индексом
+    ix_orders_user_id_created_at_id.
+    """
+    stmt = select(Order).where(Order.user_id == user_id)
+
+    if after is not None:
+        stmt = stmt.where(_after_cursor(after))
+
+    result = await db.execute(
+        stmt.order_by(Order.created_at.desc(), Order.id).limit(limit)
+    )
     return result.scalars().all()
+
+
+@track_repository
+async def search_orders_by_sku(
+    db: AsyncSession,
+    sku: str,
+    limit: int,
+    after: Optional[Tuple[datetime, UUID]] = None,
+    user_id: Optional[int] = None
+) -> List[Order]:
+    """
+    Возвращает страницу заказов, содержащих товар с указанным SKU,
+    от новых к старым.
+
+    Условие items @> '[{"sku": ...}]' обслуживается GIN-индексом
+    ix_orders_items_gin (jsonb_path_ops). Пагинация keyset по (created_at DESC, id)
+    с тем же условием курсора, что и в get_orders_by_user_id.
+
+    :param user_id: Ограничить поиск заказами пользователя; None — все заказы.
+    """
+    stmt = select(Order).where(Order.items.contains([{"sku": sku}]))
+
+    if user_id is not None:
+        stmt = stmt.where(Order.user_id == user_id)
+
+    if after is not None:
+        stmt = stmt.where(_after_cursor(after))
+
+    result = await db.execute(
+        stmt.order_by(Order.created_at.desc(), Order.id).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def stream_orders_by_user_id(
+    db: AsyncSession,
+    user_id: int,
+    batch_size: int
+) -> AsyncIterator[Sequence[Order]]:
+    """
+    Потоково читает все заказы пользователя через серверный курсор.
+    Отдаёт пачки по batch_size заказов, не загружая историю целиком в память.
+    """
+    result = await db.stream_scalars(
+        select(Order)
+        .where(Order.user_id == user_id)
+        .order_by(Order.created_at.desc(), Order.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield partition
@@ -0,0 +1,126 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Sequence, Tuple
+
+from sqlalchemy import delete, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import track_repository
+from app.infrastructure.models.order import Order, OrderStatus
+from app.infrastructure.models.order_stats import OrderStats
+
+# Приращение статистики: (user_id, статус) -> (число заказов, сумма)
+StatsDelta = Dict[Tuple[int, OrderStatus], Tuple[int, float]]
+
+
+def stats_delta() -> StatsDelta:
+    """
+    Пустое приращение; значения по отсутствующим ключам — (0, 0.0).
+    """
+    return defaultdict(lambda: (0, 0.0))
+
+
+def add_to_delta(delta: StatsDelta, user_id: int, status: OrderStatus, count: int, total: float) -> None:
+    current_count, current_total = delta[(user_id, status)]
+    delta[(user_id, status)] = (current_count + count, current_total + total)
+
+
+def orders_created_delta(orders: Iterable[Order]) -> StatsDelta:
+    """
+    Приращение для новых заказов.
+    """
+    delta = stats_delta()
+    for order in orders:
+        add_to_delta(delta, order.user_id, order.status, 1, order.total_price)
+    return delta
+
+
+def orders_deleted_delta(orders: Iterable[Order]) -> StatsDelta:
+    """
+    Приращение для удалённых заказов: вычитаются из своего статуса.
+    """
+    delta = stats_delta()
+    for order in orders:
+        status = order.status or OrderStatus.PENDING
+        add_to_delta(delta, order.user_id, status, -1, -order.total_price)
+    return delta
+
+
+def orders_moved_delta(orders: Iterable[Tuple[Order, OrderStatus]]) -> StatsDelta:
+    """
+    Приращение для смены статуса: заказ вычитается из прежнего статуса
+    и добавляется к новому.
+
+    :param orders: Пары (заказ в новом статусе, прежний статус).
+    """
+    delta = stats_delta()
+    for order, old_status in orders:
+        # Строки, созданные до появления значения по умолчанию, учитываются как PENDING
+        old_status = old_status or OrderStatus.PENDING
+        if old_status == order.status:
+            continue
+        add_to_delta(delta, order.user_id, old_status, -1, -order.total_price)
+        add_to_delta(delta, order.user_id, order.status, 1, order.total_price)
+    return delta
+
+
+async def apply_stats_delta(db: AsyncSession, delta: StatsDelta) -> None:
+    """
+    Применяет приращение одним INSERT ... ON CONFLICT DO UPDATE в рамках
+    текущей транзакции (без коммита).
+
+    Строки упорядочены по ключу: параллельные транзакции блокируют их
+    в одном порядке и не попадают во взаимоблокировку.
+    """
+    rows = [
+        {"user_id": user_id, "status": status, "count": count, "total": total}
+        for (user_id, status), (count, total) in sorted(delta.items(), key=lambda item: (item[0][0], item[0][1].value))
+        if count or total
+    ]
+    if not rows:
+        return
+
+    stmt = insert(OrderStats).values(rows)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[OrderStats.user_id, OrderStats.status],
+            set_={
+                "count": OrderStats.count + stmt.excluded.count,
+                "total": OrderStats.total + stmt.excluded.total,
+            },
+        )
+    )
+
+
+@track_repository
+async def get_order_stats(db: AsyncSession, user_id: int) -> Sequence[OrderStats]:
+    """
+    Возвращает строки статистики пользователя (не больше числа статусов).
+    """
+    result = await db.execute(select(OrderStats).where(OrderStats.user_id == user_id))
+    return result.scalars().all()
+
+
+@track_repository
+async def rebuild_order_stats(db: AsyncSession) -> int:
+    """
+    Пересчитывает статистику целиком по таблице orders одной транзакцией.
+
+    EXCLUSIVE-блокировка order_stats не мешает чтению, а транзакции с заказами
+    ждут её снятия: их приращения применяются уже поверх пересчитанных данных.
+
+    :return: Число строк статистики после пересчёта.
+    """
+    await db.execute(text("LOCK TABLE order_stats IN EXCLUSIVE MODE"))
+    await db.execute(delete(OrderStats))
+
+    status = func.coalesce(Order.status, literal_column("'PENDING'::order_status"))
+    aggregated = (
+        select(Order.user_id, status, func.count(), func.coalesce(func.sum(Order.total_price), 0))
+        .group_by(Order.user_id, status)
+    )
+    result = await db.execute(
+        insert(OrderStats).from_select(["user_id", "status", "count", "total"], aggregated)
+    )
+    await db.commit()
+    return result.rowcount
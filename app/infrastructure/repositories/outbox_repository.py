@@ -0,0 +1,48 @@
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.models.order_outbox import OrderOutbox
+
+# Тип события о создании заказа
+NEW_ORDER_EVENT = "new_order"
+
+
+def new_order_event(order_id: str) -> Dict[str, Any]:
+    """
+    Формирует строку outbox для события 'new_order'.
+    """
+    return {
+        "event": NEW_ORDER_EVENT,
+        "payload": {"event": NEW_ORDER_EVENT, "order_id": order_id},
+    }
+
+
+async def add_outbox_events(db: AsyncSession, events: List[Dict[str, Any]]) -> None:
+    """
+    Добавляет события в outbox в рамках текущей транзакции (без коммита).
+    """
+    if events:
+        await db.execute(insert(OrderOutbox), events)
+
+
+async def fetch_pending_events(db: AsyncSession, limit: int) -> Sequence[OrderOutbox]:
+    """
+    Выбирает пачку неотправленных событий и блокирует их до конца транзакции.
+    Строки, уже захваченные другими обработчиками, пропускаются (SKIP LOCKED).
+    """
+    result = await db.execute(
+        select(OrderOutbox)
+        .order_by(OrderOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return result.scalars().all()
+
+
+async def delete_events(db: AsyncSession, event_ids: List[int]) -> None:
+    """
+    Удаляет отправленные события (без коммита).
+    """
+    await db.execute(delete(OrderOutbox).where(OrderOutbox.id.in_(event_ids)))
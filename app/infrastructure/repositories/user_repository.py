@@ -1,13 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update
 from app.infrastructure.models.user import User
-from passlib.context import CryptContext
+from app.core.security import password_hasher
+from app.core.metrics import track_repository
 from typing import Optional
 
-# Контекст для хеширования паролей (используется bcrypt)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Получение пользователя по email
+@track_repository
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """
     Ищет пользователя в базе данных по email.
@@ -17,13 +17,26 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     return result.scalars().first()
 
 # Создание пользователя с хешированным паролем
+@track_repository
 async def create_user(db: AsyncSession, email: str, password: str) -> User:
     """
     Создает нового пользователя с хешированным паролем.
+    Хеширование выполняется в пуле потоков, не блокируя event loop.
     """
-    hashed_password = pwd_context.hash(password)
+    hashed_password = await password_hasher.hash(password)
     user = User(email=email, hashed_password=hashed_password)
     db.add(user)
     await db.commit()
     await db.refresh(user)
     return user
+
+# Замена хеша пароля (пересчёт при изменении стоимости bcrypt)
+@track_repository
+async def update_user_password_hash(db: AsyncSession, user_id: int, hashed_password: str) -> None:
+    """
+    Сохраняет новый хеш пароля пользователя.
+    """
+    await db.execute(
+        update(User).where(User.id == user_id).values(hashed_password=hashed_password)
+    )
+    await db.commit()
@@ -4,61 +4,161 @@
 Функциональность:
 - JWT-аутентификация (ранее Google OAuth 2.0)
 - Заказы с кешированием в Redis
-- Очереди сообщений через RabbitMQ
+- Очереди сообщений через RabbitMQ (transactional outbox)
 - Фоновая обработка через Celery
 - CORS, Rate Limiting, Middleware
 """
 
 import asyncio
+import logging
+import math
+
 from fastapi import FastAPI
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.errors import RateLimitExceeded
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from app.core.config import settings
-from app.domain.services.shared.rate_limiter import limiter
+from app.core.security import PasswordHasherOverloaded
+from app.domain.services.shared.rate_limiter import RateLimitExceeded
 from app.api.routers.auth_router import router as auth_router
 from app.api.routers.order_router import router as order_router
 from app.api.routers.user_router import router as user_router
+from app.api.routers.system_router import router as system_router
+from app.api.routers.metrics_router import router as metrics_router
+from app.core.metrics import PrometheusMiddleware, mark_process_dead
+from app.core.profiling import SlowRequestMiddleware
 from app.domain.services.messaging.rabbitmq_consumer import start_consumer
+from app.domain.services.messaging.rabbitmq_producer import publisher
+from app.domain.services.messaging.outbox_relay import outbox_relay
+from app.domain.services.cache.redis_cache import redis_client, run_invalidation_listener
+from app.infrastructure.database.replica import replica_router
+from app.infrastructure.database.session import warm_up_pool
+
+logger = logging.getLogger(__name__)
+
+
+def mount_middleware(
+        app: FastAPI,
+        cors: bool = bool(settings.allowed_origins),
+        session: bool = settings.session_middleware_enabled,
+        metrics: bool = settings.metrics_enabled,
+        slow_requests: bool = settings.slow_request_threshold_ms > 0,
+) -> None:
+    """
+    Подключает только включённые в настройках middleware (все — чистые ASGI).
+
+    Порядок добавления обратный порядку выполнения: добавленный последним
+    middleware обрабатывает запрос первым.
+    """
+    # Настройка CORS: разрешённые источники (домены). Preflight-запросы
+    # обрабатываются в middleware без маршрутизации, браузер кеширует ответ max_age секунд
+    if cors:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=settings.allowed_origins,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+            max_age=settings.cors_max_age,
+        )
+
+    # Cookie-сессии: JWT-аутентификация их не использует, по умолчанию отключены
+    if session:
+        app.add_middleware(SessionMiddleware, secret_key=settings.secret_key)
+
+    # Профили медленных запросов (только если задан порог)
+    if slow_requests:
+        app.add_middleware(SlowRequestMiddleware)
+
+    # Метрики HTTP-запросов (добавлено последним — внешний слой, учитывает всё время запроса)
+    if metrics:
+        app.add_middleware(PrometheusMiddleware)
+
+
+def create_app() -> FastAPI:
+    """
+    Создаёт приложение: маршруты, обработчики ошибок, события запуска
+    и остановки, middleware по настройкам. Ответы сериализуются через orjson.
+    """
+    app = FastAPI(
+        title="Сервис заказов",
+        version="1.0.0",
+        description="Сервис управления заказами с использованием Redis, Celery и RabbitMQ",
+        default_response_class=ORJSONResponse,
+    )
+
+    # Запуск фоновых заданий при старте приложения
+    @app.on_event("startup")
+    async def startup_event():
+        # Прогрев соединений с PostgreSQL и Redis: процесс начинает принимать
+        # запросы только после завершения startup
+        try:
+            await asyncio.gather(warm_up_pool(), redis_client.ping())
+        except Exception as e:
+            logger.error(f"Не удалось прогреть соединения при старте: {e}")
+
+        # Постоянное соединение издателя; при недоступности брокера
+        # оно будет установлено лениво при первой публикации
+        try:
+            await publisher.connect()
+        except Exception as e:
+            logger.error(f"Не удалось подключить издателя RabbitMQ при старте: {e}")
+
+        outbox_relay.start()
+
+        # Встроенный консьюмер; при CONSUMER_EMBEDDED=false события обрабатывает
+        # отдельный сервис (SERVICE_TYPE=consumer)
+        app.state.consumer_task = None
+        if settings.consumer_embedded:
+            app.state.consumer_task = asyncio.create_task(start_consumer())
+
+        # Проверка доступности реплик для чтения
+        replica_router.start_health_checks()
 
-app = FastAPI(
-    title="Сервис заказов",
-    version="1.0.0",
-    description="Сервис управления заказами с использованием Redis, Celery и RabbitMQ",
-)
+        # Подписка на инвалидацию локального уровня кеша
+        app.state.cache_listener = asyncio.create_task(run_invalidation_listener())
 
-# Запуск фонового задания при старте приложения (RabbitMQ consumer)
-@app.on_event("startup")
-async def startup_event():
-    asyncio.create_task(start_consumer())
+    # Корректное закрытие соединений при остановке приложения
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        app.state.cache_listener.cancel()
+        if app.state.consumer_task is not None:
+            app.state.consumer_task.cancel()
+        await outbox_relay.stop()
+        await publisher.close()
+        await replica_router.close()
+        mark_process_dead()
 
+    mount_middleware(app)
 
-# Настройка CORS: разрешённые источники (домены)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # Обработка превышения лимитов
+    @app.exception_handler(RateLimitExceeded)
+    async def rate_limit_handler(request, exc):
+        return ORJSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded"},
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
 
-# Подключение middleware для сессий (если требуется хранение токенов)
-app.add_middleware(SessionMiddleware, secret_key=settings.secret_key)
+    # Пул хэширования паролей перегружен
+    @app.exception_handler(PasswordHasherOverloaded)
+    async def password_hasher_overloaded_handler(request, exc):
+        return ORJSONResponse(
+            status_code=503,
+            content={"detail": "Сервис временно перегружен, повторите попытку"},
+            headers={"Retry-After": "1"},
+        )
 
-# Подключение лимитера запросов
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
+    # Регистрация маршрутов
+    app.include_router(auth_router, prefix="/auth", tags=["Auth"])
+    app.include_router(user_router, prefix="/users", tags=["Users"])
+    app.include_router(order_router, tags=["Orders"])
+    app.include_router(system_router, prefix="/system", tags=["System"])
+    if settings.metrics_enabled:
+        app.include_router(metrics_router)
 
-# Обработка превышения лимитов
-@app.exception_handler(RateLimitExceeded)
-async def rate_limit_handler(request, exc):
-    return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
+    return app
 
 
-# Регистрация маршрутов
-app.include_router(auth_router, prefix="/auth", tags=["Auth"])
-app.include_router(user_router, prefix="/users", tags=["Users"])
-app.include_router(order_router, tags=["Orders"])
+app = create_app()
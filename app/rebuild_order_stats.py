@@ -0,0 +1,31 @@
+"""
+Полный пересчёт сводной таблицы order_stats по таблице orders
+и сброс кеша статистики. Нужен после ручных правок заказов в БД
+или при подозрении на расхождение приращений.
+
+    python -m app.rebuild_order_stats
+"""
+
+import asyncio
+import logging
+
+from app.domain.services.cache.redis_cache import clear_order_stats_cache, redis_client
+from app.infrastructure.database.session import AsyncSessionLocal, engine
+from app.infrastructure.repositories.order_stats_repository import rebuild_order_stats
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    async with AsyncSessionLocal() as db:
+        rows = await rebuild_order_stats(db)
+    await clear_order_stats_cache()
+    logger.info(f"Статистика заказов пересчитана, строк: {rows}")
+
+    await redis_client.aclose()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
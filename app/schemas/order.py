@@ -1,7 +1,8 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from uuid import UUID
-from typing import List, Dict
+from typing import List, Dict, Optional
 
+from app.core.config import settings
 from app.domain.enums.order_status import OrderStatus
 
 
@@ -26,8 +27,58 @@ class OrderOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)  # Позволяет использовать ORM-объекты
 
 
+class OrderPage(BaseModel):
+    """
+    Страница списка заказов. next_cursor передаётся в следующий запрос
+    для получения продолжения; None — страниц больше нет.
+    """
+    items: List[OrderOut]
+    next_cursor: Optional[str] = None
+
+
+class OrderLookup(BaseModel):
+    """
+    Схема запроса для получения нескольких заказов по ID.
+    """
+    ids: List[UUID] = Field(..., min_length=1, max_length=settings.orders_lookup_max_ids)
+
+
+class OrderBatchCreate(BaseModel):
+    """
+    Схема запроса для пакетного создания заказов.
+    """
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=settings.order_batch_max_size)
+
+
+class OrderBatchItemOut(BaseModel):
+    """
+    Результат создания одного заказа из пачки.
+    Поле index — позиция заказа в исходном запросе.
+    """
+    index: int
+    order: OrderOut
+
+
 class OrderUpdateStatus(BaseModel):
     """
     Схема запроса для обновления статуса заказа.
     """
     status: OrderStatus
+
+
+class OrderStatusStats(BaseModel):
+    """
+    Число и сумма заказов пользователя в одном статусе.
+    """
+    count: int
+    total: float
+
+
+class OrderStatsOut(BaseModel):
+    """
+    Статистика заказов пользователя: по статусам, всего и сумма трат (PAID и SHIPPED).
+    """
+    user_id: int
+    total_orders: int
+    lifetime_spend: float
+    by_status: Dict[OrderStatus, OrderStatusStats]
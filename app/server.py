@@ -0,0 +1,35 @@
+"""
+Запуск API в production-режиме с параметрами из настроек.
+
+Несколько процессов uvicorn (WEB_WORKERS, 0 — по числу CPU) делят один
+слушающий сокет; в каждом процессе uvloop и httptools. Процессы, упавшие
+или отработавшие WEB_LIMIT_MAX_REQUESTS запросов, перезапускаются.
+
+    python -m app.server
+"""
+
+import os
+
+import uvicorn
+
+from app.core.config import settings
+
+
+def main() -> None:
+    uvicorn.run(
+        "app.main:app",
+        host=settings.web_host,
+        port=settings.web_port,
+        workers=settings.web_workers or os.cpu_count() or 1,
+        loop=settings.web_loop,
+        http=settings.web_http,
+        backlog=settings.web_backlog,
+        timeout_keep_alive=settings.web_keepalive_timeout,
+        limit_max_requests=settings.web_limit_max_requests or None,
+        access_log=settings.web_access_log,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Бенчмарки сервиса заказов.
+
+Скрипты запускаются из корня проекта как модули, например:
+    python -m bench.publisher
+Результаты выводятся в stdout в формате JSON.
+"""
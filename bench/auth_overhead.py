@@ -0,0 +1,70 @@
+"""
+Накладные расходы авторизации на запрос: прежняя схема (jwt.decode и поиск
+пользователя в БД на каждый запрос) против кеша пользователей в get_current_user.
+
+Требуются запущенные PostgreSQL и Redis (параметры берутся из .env):
+    python -m bench.auth_overhead --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from jose import jwt
+from sqlalchemy import select
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.domain.services.auth.auth_service import create_access_token
+from app.infrastructure.database.session import AsyncSessionLocal, engine
+from app.infrastructure.models.user import User
+from app.infrastructure.repositories.user_repository import get_user_by_email
+from bench.stats import summarize
+
+BENCH_EMAIL = "bench-auth@example.com"
+
+
+async def legacy_current_user(token: str, db) -> User:
+    """
+    Прежняя схема get_current_user.
+    """
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    return await get_user_by_email(db, payload["sub"])
+
+
+async def run(resolve, token: str, requests: int) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for _ in range(requests):
+            call_started = time.perf_counter()
+            await resolve(token=token, db=db)
+            latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def main(requests: int) -> None:
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.email == BENCH_EMAIL))).scalar_one_or_none()
+        if user is None:
+            user = User(email=BENCH_EMAIL, hashed_password="-")
+            db.add(user)
+            await db.commit()
+
+    legacy_token = create_access_token({"sub": user.email})
+    token = create_access_token({"sub": user.email, "uid": user.id})
+
+    results = {
+        "legacy_decode_and_db_lookup": await run(legacy_current_user, legacy_token, requests),
+        "cached_legacy_token": await run(get_current_user, legacy_token, requests),
+        "cached_uid_token": await run(get_current_user, token, requests),
+    }
+    await engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
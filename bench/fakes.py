@@ -0,0 +1,134 @@
+"""
+Внутрипроцессные заменители брокера и кеша для нагрузочных прогонов,
+а также счётчики обращений к БД и Redis по типам операций.
+"""
+import collections
+import contextvars
+from typing import Any, Dict, Iterable, Optional
+
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.domain.services.cache import redis_cache
+from app.domain.services.messaging.rabbitmq_producer import ORDERS_QUEUE, publisher
+
+# Операция, в рамках которой выполняется текущий запрос. Обращения вне запроса
+# (релей outbox, проверки реплик, слушатель инвалидации) относятся к BACKGROUND
+BACKGROUND = "background"
+current_operation: contextvars.ContextVar[str] = contextvars.ContextVar("bench_operation", default=BACKGROUND)
+
+# Число обращений по типу хранилища и операции: {"db": {"create": 42}, "redis": {...}}
+round_trips: Dict[str, collections.Counter] = {
+    "db": collections.Counter(),
+    "redis": collections.Counter(),
+}
+
+_counting_installed = False
+
+
+def _count_db(conn, cursor, statement, parameters, context, executemany):
+    round_trips["db"][current_operation.get()] += 1
+
+
+def install_round_trip_counters() -> None:
+    """
+    Подключает счётчики: запросы SQL всех движков (primary и реплики) и команды
+    Redis. Пайплайн считается одним обращением.
+    """
+    global _counting_installed
+    if _counting_installed:
+        return
+
+    event.listen(Engine, "before_cursor_execute", _count_db)
+
+    execute_command = redis.Redis.execute_command
+    execute_pipeline = Pipeline.execute
+
+    async def counted_execute_command(self, *args, **options):
+        round_trips["redis"][current_operation.get()] += 1
+        return await execute_command(self, *args, **options)
+
+    async def counted_execute_pipeline(self, *args, **kwargs):
+        round_trips["redis"][current_operation.get()] += 1
+        return await execute_pipeline(self, *args, **kwargs)
+
+    redis.Redis.execute_command = counted_execute_command
+    Pipeline.execute = counted_execute_pipeline
+    _counting_installed = True
+
+
+def reset_round_trips() -> None:
+    for counter in round_trips.values():
+        counter.clear()
+
+
+class FakeBroker:
+    """
+    Заменитель RabbitMQ: издатель принимает сообщения и сразу «подтверждает» их.
+    """
+
+    def __init__(self):
+        self.published: Dict[str, int] = collections.Counter()
+
+    async def connect(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+    async def publish(self, payload: Dict[str, Any], routing_key: str = ORDERS_QUEUE) -> None:
+        await self.publish_many([payload], routing_key=routing_key)
+
+    async def publish_many(self, payloads: Iterable[Dict[str, Any]], routing_key: str = ORDERS_QUEUE) -> None:
+        self.published[routing_key] += len(list(payloads))
+
+
+async def _no_consumer() -> None:
+    return None
+
+
+def install_fake_broker(app_module) -> FakeBroker:
+    """
+    Подменяет методы издателя-синглтона (им же пользуется релей outbox)
+    и отключает встроенный консьюмер приложения.
+
+    :param app_module: Модуль app.main.
+    """
+    broker = FakeBroker()
+    for name in ("connect", "close", "publish", "publish_many"):
+        setattr(publisher, name, getattr(broker, name))
+    app_module.start_consumer = _no_consumer
+    return broker
+
+
+def install_fake_cache() -> None:
+    """
+    Переключает клиент Redis на внутрипроцессный сервер fakeredis.
+
+    Подменяется пул соединений, а не сам клиент: модули, импортировавшие
+    redis_client, и зарегистрированные Lua-скрипты продолжают работать.
+    Требуются пакеты fakeredis и lupa (Lua-скрипты).
+    """
+    try:
+        import fakeredis
+        from fakeredis.aioredis import FakeConnection
+    except ImportError as e:
+        raise RuntimeError("Для --fake-cache установите: pip install fakeredis lupa") from e
+
+    redis_cache.redis_client.connection_pool = redis.ConnectionPool(
+        connection_class=FakeConnection,
+        server=fakeredis.FakeServer(),
+    )
+
+
+def per_request(kind: str, operation: str, requests: int) -> Optional[float]:
+    if not requests:
+        return None
+    return round(round_trips[kind][operation] / requests, 2)
+
+
+def background_round_trips() -> Dict[str, int]:
+    return {kind: counter[BACKGROUND] for kind, counter in round_trips.items()}
+
@@ -0,0 +1,376 @@
+"""
+Нагрузочный прогон API: смесь register/token/create/get/list/patch,
+пропускная способность, p50/p95/p99 и число обращений к БД и Redis на запрос.
+
+Внутри процесса (приложение запускается через ASGI, нужен PostgreSQL из .env;
+брокер и кеш можно заменить внутрипроцессными заменителями):
+    python -m bench.load --fake-broker --fake-cache --duration 30 --concurrency 50
+
+Против запущенного сервиса (обращения к БД и Redis не считаются):
+    python -m bench.load --url http://localhost:8000 --model open --rate 300
+
+Сравнение с сохранённым результатом (код выхода 1 при регрессии):
+    python -m bench.load --fake-broker --fake-cache --save-baseline bench/baseline.json
+    python -m bench.load --fake-broker --fake-cache --baseline bench/baseline.json --tolerance 0.15
+
+Лимиты запросов стоит отключить: RATE_LIMIT_ENABLED=false.
+"""
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.domain.enums.order_status import OrderStatus
+from bench import fakes
+from bench.stats import summarize
+
+OPERATIONS = ("register", "token", "create", "get", "list", "patch")
+
+# Смесь по умолчанию: преобладают чтения, вход и регистрация редки
+DEFAULT_MIX = "register=1,token=2,create=15,get=55,list=20,patch=7"
+
+PASSWORD = "bench-password"
+SKUS = [f"SKU-{n:04d}" for n in range(200)]
+
+
+def parse_mix(raw: str) -> Dict[str, float]:
+    """
+    Разбирает смесь вида "get=55,create=15" в веса операций.
+    """
+    mix = {}
+    for item in raw.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Неизвестная операция: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    id: int
+    token: Optional[str] = None
+    order_ids: List[str] = field(default_factory=list)
+
+
+class Workload:
+    """
+    Состояние прогона: пул пользователей с их заказами и замеры по операциям.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], rng: random.Random):
+        self.client = client
+        self.rng = rng
+        self.users: List[VirtualUser] = []
+        self.latencies: Dict[str, List[float]] = collections.defaultdict(list)
+        self.errors: Dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+        self._operations = list(mix)
+        self._weights = list(mix.values())
+
+    def next_operation(self) -> str:
+        return self.rng.choices(self._operations, self._weights)[0]
+
+    async def setup(self, users: int, orders_per_user: int) -> None:
+        """
+        Создаёт пользователей и начальные заказы; эти запросы в замеры не входят.
+        """
+        for _ in range(users):
+            user = await self._register()
+            await self._login(user)
+            for _ in range(orders_per_user):
+                await self._create(user)
+
+    async def execute(self, operation: str) -> None:
+        """
+        Выполняет одну операцию смеси и записывает её длительность или ошибку.
+        """
+        token = fakes.current_operation.set(operation)
+        started = time.perf_counter()
+        try:
+            await getattr(self, f"_op_{operation}")()
+        except httpx.HTTPStatusError as e:
+            self.errors[operation][str(e.response.status_code)] += 1
+        except httpx.HTTPError as e:
+            self.errors[operation][type(e).__name__] += 1
+        else:
+            self.latencies[operation].append(time.perf_counter() - started)
+        finally:
+            fakes.current_operation.reset(token)
+
+    def _pick_user(self) -> VirtualUser:
+        return self.rng.choice(self.users)
+
+    def _pick_order(self):
+        user = self._pick_user()
+        if not user.order_ids:
+            return user, None
+        return user, self.rng.choice(user.order_ids)
+
+    @staticmethod
+    def _auth(user: VirtualUser) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {user.token}"}
+
+    async def _register(self) -> VirtualUser:
+        email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+        response = await self.client.post("/auth/register/", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+        user = VirtualUser(email=email, id=response.json()["id"])
+        self.users.append(user)
+        return user
+
+    async def _login(self, user: VirtualUser) -> None:
+        response = await self.client.post("/auth/token/", data={"username": user.email, "password": PASSWORD})
+        response.raise_for_status()
+        user.token = response.json()["access_token"]
+
+    async def _create(self, user: VirtualUser) -> None:
+        items = [
+            {"sku": self.rng.choice(SKUS), "qty": str(self.rng.randint(1, 5))}
+            for _ in range(self.rng.randint(1, 4))
+        ]
+        response = await self.client.post(
+            "/orders/",
+            json={"items": items, "total_price": round(self.rng.uniform(5, 500), 2)},
+            headers=self._auth(user),
+        )
+        response.raise_for_status()
+        user.order_ids.append(response.json()["id"])
+
+    async def _op_register(self) -> None:
+        user = await self._register()
+        await self._login(user)
+
+    async def _op_token(self) -> None:
+        await self._login(self._pick_user())
+
+    async def _op_create(self) -> None:
+        await self._create(self._pick_user())
+
+    async def _op_get(self) -> None:
+        user, order_id = self._pick_order()
+        if order_id is None:
+            return await self._create(user)
+        response = await self.client.get(f"/orders/{order_id}/", headers=self._auth(user))
+        response.raise_for_status()
+
+    async def _op_list(self) -> None:
+        user = self._pick_user()
+        response = await self.client.get(f"/orders/user/{user.id}/", params={"limit": 50}, headers=self._auth(user))
+        response.raise_for_status()
+
+    async def _op_patch(self) -> None:
+        user, order_id = self._pick_order()
+        if order_id is None:
+            return await self._create(user)
+        status = self.rng.choice([s.value for s in OrderStatus])
+        response = await self.client.patch(f"/orders/{order_id}/", json={"status": status}, headers=self._auth(user))
+        response.raise_for_status()
+
+
+async def run_closed(workload: Workload, concurrency: int, duration: float, requests: Optional[int]) -> float:
+    """
+    Закрытая модель: `concurrency` клиентов, каждый отправляет следующий
+    запрос сразу после ответа на предыдущий.
+    """
+    deadline = time.perf_counter() + duration
+    remaining = [requests] if requests else None
+
+    async def client_loop():
+        while time.perf_counter() < deadline:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            await workload.execute(workload.next_operation())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+async def run_open(workload: Workload, rate: float, max_in_flight: int, duration: float) -> float:
+    """
+    Открытая модель: запросы поступают пуассоновским потоком с частотой `rate`
+    независимо от ответов. Если в обработке уже `max_in_flight` запросов,
+    новый запрос ждёт свободного места (задержка ожидания входит в замер).
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+
+    async def fire(operation: str):
+        async with slots:
+            await workload.execute(operation)
+
+    started = time.perf_counter()
+    next_at = started
+    while next_at - started < duration:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        task = asyncio.create_task(fire(workload.next_operation()))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        next_at += workload.rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started
+
+
+def build_report(workload: Workload, elapsed: float, config: Dict[str, Any], count_round_trips: bool) -> Dict[str, Any]:
+    operations = {}
+    for operation in OPERATIONS:
+        latencies = workload.latencies.get(operation, [])
+        errors = workload.errors.get(operation, {})
+        if not latencies and not errors:
+            continue
+        summary = summarize(latencies, elapsed)
+        summary["errors"] = dict(errors)
+        if count_round_trips:
+            attempts = len(latencies) + sum(errors.values())
+            summary["db_round_trips_per_request"] = fakes.per_request("db", operation, attempts)
+            summary["redis_round_trips_per_request"] = fakes.per_request("redis", operation, attempts)
+        operations[operation] = summary
+
+    all_latencies = [value for values in workload.latencies.values() for value in values]
+    report = {
+        "config": config,
+        "total": summarize(all_latencies, elapsed),
+        "operations": operations,
+    }
+    report["total"]["errors"] = sum(sum(errors.values()) for errors in workload.errors.values())
+    if count_round_trips:
+        report["background_round_trips"] = fakes.background_round_trips()
+    return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Сравнивает прогон с базовым. Регрессия — рост p95/p99 или падение пропускной
+    способности больше чем на `tolerance`, а также любой рост числа обращений
+    к БД и Redis на запрос.
+    """
+    regressions = []
+    for operation, base in baseline.get("operations", {}).items():
+        current = report["operations"].get(operation)
+        if current is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{operation}.{metric}: {base[metric]} -> {current[metric]}")
+        if current["throughput_per_sec"] < base["throughput_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{operation}.throughput_per_sec: {base['throughput_per_sec']} -> {current['throughput_per_sec']}"
+            )
+        for metric in ("db_round_trips_per_request", "redis_round_trips_per_request"):
+            if base.get(metric) is not None and current.get(metric) is not None and current[metric] > base[metric]:
+                regressions.append(f"{operation}.{metric}: {base[metric]} -> {current[metric]}")
+    return regressions
+
+
+@contextlib.asynccontextmanager
+async def open_client(args):
+    """
+    Клиент к запущенному сервису (--url) либо к приложению в этом же процессе.
+    """
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            yield client
+        return
+
+    import app.main as app_module
+
+    if args.fake_broker:
+        fakes.install_fake_broker(app_module)
+    if args.fake_cache:
+        fakes.install_fake_cache()
+    fakes.install_round_trip_counters()
+
+    app = app_module.app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            yield client
+
+
+async def run_load(args) -> Dict[str, Any]:
+    """
+    Выполняет прогон с параметрами командной строки и возвращает отчёт.
+    """
+    mix = parse_mix(args.mix)
+    config = {
+        "target": args.url or "in-process",
+        "fake_broker": args.fake_broker,
+        "fake_cache": args.fake_cache,
+        "model": args.model,
+        "concurrency": args.concurrency,
+        "rate": args.rate if args.model == "open" else None,
+        "duration": args.duration,
+        "requests": args.requests,
+        "users": args.users,
+        "mix": mix,
+        "seed": args.seed,
+    }
+
+    async with open_client(args) as client:
+        workload = Workload(client, mix, random.Random(args.seed))
+        await workload.setup(args.users, args.orders_per_user)
+        fakes.reset_round_trips()
+
+        if args.model == "closed":
+            elapsed = await run_closed(workload, args.concurrency, args.duration, args.requests)
+        else:
+            elapsed = await run_open(workload, args.rate, args.concurrency, args.duration)
+
+        return build_report(workload, elapsed, config, count_round_trips=not args.url)
+
+
+async def main(args) -> int:
+    report = await run_load(args)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        report["regressions"] = regressions
+        exit_code = 1 if regressions else 0
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return exit_code
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Адрес запущенного сервиса; без него приложение запускается в процессе")
+    parser.add_argument("--fake-broker", action="store_true", help="Заменить RabbitMQ внутрипроцессным заменителем")
+    parser.add_argument("--fake-cache", action="store_true", help="Заменить Redis на fakeredis")
+    parser.add_argument("--model", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=50, help="Клиентов (closed) или максимум запросов в обработке (open)")
+    parser.add_argument("--rate", type=float, default=200.0, help="Запросов в секунду для модели open")
+    parser.add_argument("--duration", type=float, default=30.0, help="Длительность прогона, сек")
+    parser.add_argument("--requests", type=int, help="Ограничить число запросов (модель closed)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--orders-per-user", type=int, default=20)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--baseline", help="Файл с базовым результатом для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Допустимое ухудшение p95/p99 и пропускной способности")
+    parser.add_argument("--save-baseline", help="Сохранить результат как базовый")
+    return parser
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(build_parser().parse_args())))
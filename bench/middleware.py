@@ -0,0 +1,120 @@
+"""
+Накладные расходы стека middleware и сериализации ответа на один запрос.
+
+Запросы подаются напрямую в ASGI-приложение (без сети, БД и Redis), маршрут
+возвращает страницу заказов. Сравниваются:
+- прежний стек: CORS + Session + метрики, JSONResponse;
+- стек create_app по умолчанию: CORS + метрики, ORJSONResponse;
+- минимальный стек: без middleware, ORJSONResponse;
+а также обработка CORS preflight (OPTIONS).
+
+Параметры окружения берутся из .env (нужен только импорт настроек):
+    python -m bench.middleware --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.core.config import settings
+from app.main import mount_middleware
+from app.schemas.order import OrderPage
+from bench.stats import summarize
+
+ORIGIN = settings.allowed_origins[0] if settings.allowed_origins else "http://localhost"
+
+PAGE = {
+    "items": [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": 1,
+            "items": [{"sku": f"SKU-{n:04d}", "qty": "2"}],
+            "total_price": 99.5,
+            "status": "PENDING",
+        }
+        for n in range(50)
+    ],
+    "next_cursor": None,
+}
+
+
+def build_app(response_class, **middleware) -> FastAPI:
+    app = FastAPI(default_response_class=response_class)
+
+    @app.get("/orders/", response_model=OrderPage)
+    async def orders():
+        return PAGE
+
+    mount_middleware(app, **middleware)
+    return app
+
+
+async def call(app, method: str, headers) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": "/orders/",
+        "raw_path": b"/orders/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    await app(scope, receive, send)
+
+
+async def measure(app, requests: int, method: str = "GET", headers=None) -> dict:
+    headers = headers or [(b"host", b"bench"), (b"origin", ORIGIN.encode())]
+    for _ in range(100):  # прогрев
+        await call(app, method, headers)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        call_started = time.perf_counter()
+        await call(app, method, headers)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def main(requests: int) -> None:
+    legacy = build_app(JSONResponse, cors=True, session=True, metrics=True, slow_requests=False)
+    lean = build_app(ORJSONResponse, cors=True, session=False, metrics=True, slow_requests=False)
+    bare = build_app(ORJSONResponse, cors=False, session=False, metrics=False, slow_requests=False)
+
+    preflight_headers = [
+        (b"host", b"bench"),
+        (b"origin", ORIGIN.encode()),
+        (b"access-control-request-method", b"GET"),
+        (b"access-control-request-headers", b"authorization"),
+    ]
+
+    results = {
+        "legacy_cors_session_metrics_json": await measure(legacy, requests),
+        "default_cors_metrics_orjson": await measure(lean, requests),
+        "bare_orjson": await measure(bare, requests),
+        "cors_preflight": await measure(lean, requests, "OPTIONS", preflight_headers),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
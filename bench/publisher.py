@@ -0,0 +1,98 @@
+"""
+Сравнение публикации событий 'new_order': соединение на каждый вызов
+против постоянного издателя с пулом каналов и publisher confirms.
+
+Требуется запущенный RabbitMQ (параметры берутся из .env):
+    python -m bench.publisher --messages 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from uuid import uuid4
+
+import aio_pika
+from aio_pika import DeliveryMode
+
+from app.core.config import settings
+from app.domain.services.messaging.rabbitmq_producer import ORDERS_QUEUE, RabbitMQPublisher
+from bench.stats import summarize
+
+# Отдельная очередь, чтобы не засорять рабочую
+BENCH_QUEUE = f"{ORDERS_QUEUE}_bench"
+
+
+async def publish_per_call(order_id: str) -> None:
+    """
+    Прежняя схема: новое соединение, канал и объявление очереди на каждое сообщение.
+    """
+    connection = await aio_pika.connect_robust(
+        host=settings.rabbitmq_host,
+        port=settings.rabbitmq_port,
+        login=settings.rabbitmq_user,
+        password=settings.rabbitmq_password,
+    )
+    async with connection:
+        channel = await connection.channel()
+        await channel.declare_queue(BENCH_QUEUE, durable=True)
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=json.dumps({"event": "new_order", "order_id": order_id}).encode(),
+                delivery_mode=DeliveryMode.PERSISTENT,
+            ),
+            routing_key=BENCH_QUEUE,
+        )
+
+
+async def run(publish, messages: int, concurrency: int) -> dict:
+    """
+    Прогоняет `messages` публикаций не более чем в `concurrency` параллельных корутинах.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await publish(str(uuid4()))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(messages)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def main(messages: int, concurrency: int) -> None:
+    publisher = RabbitMQPublisher()
+    await publisher.connect()
+
+    async def publish_pooled(order_id: str) -> None:
+        await publisher.publish({"event": "new_order", "order_id": order_id}, routing_key=BENCH_QUEUE)
+
+    # Очередь для прогона объявляется заранее
+    connection = await aio_pika.connect_robust(
+        host=settings.rabbitmq_host,
+        port=settings.rabbitmq_port,
+        login=settings.rabbitmq_user,
+        password=settings.rabbitmq_password,
+    )
+    async with connection:
+        channel = await connection.channel()
+        queue = await channel.declare_queue(BENCH_QUEUE, durable=True)
+
+        results = {
+            "per_call_connection": await run(publish_per_call, messages, concurrency),
+            "pooled_publisher": await run(publish_pooled, messages, concurrency),
+        }
+        await queue.purge()
+
+    await publisher.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.concurrency))
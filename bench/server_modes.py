@@ -0,0 +1,86 @@
+"""
+Сравнение режимов запуска API под одинаковой нагрузкой bench.load:
+один процесс uvicorn (прежний запуск из entrypoint.sh) против
+python -m app.server (несколько процессов, uvloop, httptools).
+
+Каждый режим запускается отдельным процессом на свободном порту; нужны
+PostgreSQL, Redis и RabbitMQ из .env. Остальные аргументы передаются bench.load:
+    python -m bench.server_modes --workers 4 -- --duration 30 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from bench.load import build_parser, run_load
+
+# Команды запуска; адрес и число процессов для app.server задаются через окружение
+MODES = {
+    "single": lambda port: [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+    "multi": lambda port: [sys.executable, "-m", "app.server"],
+}
+
+
+def _server_env(port: int, workers: int) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "WEB_HOST": "127.0.0.1",
+        "WEB_PORT": str(port),
+        "WEB_WORKERS": str(workers),
+        "WEB_ACCESS_LOG": "false",
+        "RATE_LIMIT_ENABLED": "false",
+    })
+    return env
+
+
+async def _wait_ready(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get("/metrics")
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Сервер {url} не запустился за {timeout} с")
+
+
+async def run_mode(mode: str, port: int, workers: int, load_args: List[str]) -> Dict[str, Any]:
+    """
+    Запускает сервер в указанном режиме, прогоняет нагрузку и останавливает его.
+    """
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(MODES[mode](port), env=_server_env(port, workers))
+    try:
+        await _wait_ready(url, timeout=60)
+        args = build_parser().parse_args(["--url", url, *load_args])
+        report = await run_load(args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return {"operations": report["operations"], "total": report["total"]}
+
+
+async def main(args, load_args: List[str]) -> None:
+    workers = args.workers or os.cpu_count() or 1
+    results = {"workers": workers}
+    for offset, mode in enumerate(MODES):
+        results[mode] = await run_mode(mode, args.port + offset, workers, load_args)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0, help="Процессов в режиме multi (0 — по числу CPU)")
+    parser.add_argument("--port", type=int, default=18000)
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    asyncio.run(main(parser.parse_args(argv[:split]), argv[split + 1:]))
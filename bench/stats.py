@@ -0,0 +1,30 @@
+import statistics
+from typing import Dict, List
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """
+    Возвращает q-й перцентиль (0..100) по отсортированной выборке.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """
+    Сводка по замерам: пропускная способность и перцентили задержки в миллисекундах.
+
+    :param latencies: Длительности отдельных операций в секундах
+    :param elapsed: Общее время прогона в секундах
+    """
+    return {
+        "count": len(latencies),
+        "throughput_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
@@ -0,0 +1,102 @@
+"""
+Число запросов к БД при одновременном промахе кеша по одному заказу
+(thundering herd): прежняя схема против single-flight в get_order_with_cache.
+
+Требуются запущенные PostgreSQL и Redis (параметры берутся из .env):
+    python -m bench.thundering_herd --requests 500
+"""
+import argparse
+import asyncio
+import json
+import time
+from uuid import UUID
+
+from sqlalchemy import event, select
+
+from app.infrastructure.database.session import AsyncSessionLocal, engine
+from app.infrastructure.models.user import User
+from app.infrastructure.repositories.order_repository import create_order, delete_order, get_order_by_id
+from app.domain.services.cache.redis_cache import (
+    delete_order_cache,
+    get_order_from_cache,
+    set_order_to_cache,
+)
+from app.domain.services.order.order_service import get_order_with_cache
+from app.domain.services.order.order_serializer import encode_order
+from bench.stats import summarize
+
+BENCH_EMAIL = "bench-herd@example.com"
+
+# Счётчик запросов к таблице orders
+_queries = {"orders": 0}
+
+
+def _count_queries(conn, cursor, statement, parameters, context, executemany):
+    if "FROM orders" in statement:
+        _queries["orders"] += 1
+
+
+async def naive_get(db, order_id: UUID):
+    """
+    Прежняя схема: каждый промах независимо идёт в БД.
+    """
+    cached = await get_order_from_cache(str(order_id))
+    if cached:
+        return cached
+    order = await get_order_by_id(db, order_id)
+    order_data = encode_order(order)
+    await set_order_to_cache(str(order_id), order_data)
+    return order_data
+
+
+async def herd(get, order_id: UUID, requests: int) -> dict:
+    """
+    Сбрасывает ключ и запускает `requests` одновременных чтений заказа.
+    """
+    await delete_order_cache(str(order_id))
+    _queries["orders"] = 0
+    latencies = []
+
+    async def one() -> None:
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await get(db, order_id)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return {"db_queries": _queries["orders"], **summarize(latencies, time.perf_counter() - started)}
+
+
+async def prepare_order() -> UUID:
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.email == BENCH_EMAIL))).scalar_one_or_none()
+        if user is None:
+            user = User(email=BENCH_EMAIL, hashed_password="-")
+            db.add(user)
+            await db.commit()
+        order = await create_order(db, user.id, [{"sku": "bench"}], 1.0)
+        return order.id
+
+
+async def main(requests: int) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_queries)
+    order_id = await prepare_order()
+
+    results = {
+        "naive": await herd(naive_get, order_id, requests),
+        "single_flight": await herd(get_order_with_cache, order_id, requests),
+    }
+
+    # Удаление через репозиторий, чтобы заказ был вычтен и из статистики пользователя
+    async with AsyncSessionLocal() as db:
+        await delete_order(db, order_id)
+    await engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -30,16 +30,25 @@ if [ "$SERVICE_TYPE" = "api" ]; then
   alembic upgrade head
 fi
 
+# Каталог метрик Prometheus для многопроцессного режима (воркеры uvicorn, Celery prefork)
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Запуск нужного сервиса
 case "$SERVICE_TYPE" in
   api)
     echo "🚀 Запуск FastAPI приложения..."
-    exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+    exec python -m app.server
     ;;
   worker)
     echo "🚀 Запуск Celery воркера..."
     exec celery -A app.domain.services.tasks.celery_worker worker --loglevel=info
     ;;
+  consumer)
+    echo "🚀 Запуск консьюмера событий заказов..."
+    exec python -m app.consumer
+    ;;
   flower)
     echo "🌸 Запуск Flower..."
     exec celery -A app.domain.services.tasks.celery_worker flower --port=5555